@@ -1,7 +1,21 @@
+import os
+
 import streamlit as st
 
+from page_contents.components import (
+    import_time_report,
+    start_cache_warm_up,
+    warm_up_progress,
+)
+from src.load_generator import cache
+
 st.set_page_config(layout="wide")
 
+# keep generated profiles in memory across reruns and sessions, unless another
+# cache backend is configured via IND_E_CACHE:
+if "IND_E_CACHE" not in os.environ:
+    cache.configure("memory", maxsize=256)
+
 
 # https://discuss.streamlit.io/t/keep-menu-without-header/46558/2
 st.markdown(
@@ -37,4 +51,17 @@ page = st.navigation(
     ],
     position="sidebar",
 )
+
+# precompute the default profiles and regional data in the background, unless
+# disabled with IND_E_WARM_UP=0
+if os.environ.get("IND_E_WARM_UP") != "0":
+    warm_up = start_cache_warm_up()
+    if not warm_up.done():
+        with st.sidebar:
+            warm_up_progress(warm_up)
+
+# debug mode: set IND_E_DEBUG or open the app with ?debug
+if os.environ.get("IND_E_DEBUG") or "debug" in st.query_params:
+    import_time_report()
+
 page.run()
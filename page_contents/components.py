@@ -4,27 +4,151 @@ import io
 import pandas as pd
 import streamlit as st
 
+from src.importtime import measure_import_times
+from src.warmup import WarmUp, start_warm_up
 
-@st.cache_data(show_spinner=False)
-def create_excel_file(df: pd.DataFrame) -> io.BytesIO:
+# third-party and own modules imported by the pages
+PAGE_IMPORTS = [
+    "pandas",
+    "plotly.express",
+    "geopandas",
+    "folium",
+    "streamlit_folium",
+    "src.load_generator.pipeline",
+    "src.synthetic_profile_store",
+]
+
+
+# file format: (label, suffix, mime type)
+FILE_FORMATS = {
+    "xlsx": (
+        "Excel",
+        ".xlsx",
+        "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+    ),
+    "parquet": ("Parquet", ".parquet", "application/vnd.apache.parquet"),
+    "arrow": ("Arrow IPC", ".arrow", "application/vnd.apache.arrow.file"),
+    "csv.gz": ("CSV (gzip)", ".csv.gz", "application/gzip"),
+}
+
+
+def write_excel(df: pd.DataFrame, buffer: io.BytesIO):
+    import xlsxwriter
+
+    # constant_memory flushes every row once it is written, so the rows have to
+    # be written in order (pandas' to_excel writes column by column)
+    # like to_excel, NaN is written as empty cell; inf as #NUM! error
+    workbook = xlsxwriter.Workbook(
+        buffer, {"constant_memory": True, "nan_inf_to_errors": True}
+    )
+    worksheet = workbook.add_worksheet()
+    date_format = workbook.add_format({"num_format": "yyyy-mm-dd hh:mm"})
+    bold = workbook.add_format({"bold": True})
+
+    worksheet.write_row(0, 0, [df.index.name or "", *map(str, df.columns)], bold)
+    is_datetime = isinstance(df.index, pd.DatetimeIndex)
+    index = df.index.to_pydatetime() if is_datetime else df.index.tolist()
+    rows = df.astype(object).where(df.notna(), None).to_numpy().tolist()
+    for row, (label, values) in enumerate(zip(index, rows), 1):
+        if is_datetime:
+            worksheet.write_datetime(row, 0, label, date_format)
+        else:
+            worksheet.write(row, 0, label)
+        worksheet.write_row(row, 1, values)
+    worksheet.set_column(0, 0, 18)
+    workbook.close()
+
+
+def write_file(df: pd.DataFrame, file_format: str) -> bytes:
+    """Serialize a frame (with its index) to one of the FILE_FORMATS."""
     buffer = io.BytesIO()
-    with pd.ExcelWriter(buffer, engine="xlsxwriter") as writer:
-        df.to_excel(writer, merge_cells=False)
-    return buffer
+    if file_format == "xlsx":
+        write_excel(df, buffer)
+    elif file_format == "csv.gz":
+        df.to_csv(buffer, compression={"method": "gzip"})
+    else:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        table = pa.Table.from_pandas(df.rename(columns=str))
+        if file_format == "parquet":
+            pq.write_table(table, buffer)
+        else:
+            with pa.ipc.new_file(buffer, table.schema) as writer:
+                writer.write_table(table)
+    return buffer.getvalue()
+
+
+@st.cache_data(show_spinner="Preparing download...", max_entries=32)
+def create_file(file_format: str, params: tuple, _df: pd.DataFrame) -> bytes:
+    # keyed by the parameters that generated the frame, the frame is not hashed
+    return write_file(_df, file_format)
 
 
 def download_excel_file(
     filename: str,
     df: pd.DataFrame,
-    label: str = "Tabelle als .xlsx herunterladen",
+    label: str = "Download table",
     key: str = "excel-download",
+    params: tuple | None = None,
 ):
-    if st.button("Prepare data for Excel download", key=f"btn-{key}"):
-        buffer = create_excel_file(df)
-        st.download_button(
-            label=label,
-            icon=":material/download:",
-            data=buffer,
-            file_name=filename,
-            mime="application/vnd.ms-excel",
+    """Download button for ``df`` in a selectable file format.
+
+    ``filename`` is given without suffix. ``params`` are the parameters that
+    generated ``df`` (e.g. industry, region, date range); the prepared files are
+    cached by them. Without ``params`` the frame itself is hashed.
+    """
+    cols = st.columns([1, 2])
+    with cols[0]:
+        file_format = st.selectbox(
+            "File format",
+            FILE_FORMATS,
+            format_func=lambda x: FILE_FORMATS[x][0],
+            key=f"format-{key}",
+        )
+    format_label, suffix, mime = FILE_FORMATS[file_format]
+    if params is None:
+        params = (pd.util.hash_pandas_object(df).sum(),)
+    with cols[1]:
+        if st.button(f"Prepare data for {format_label} download", key=f"btn-{key}"):
+            st.download_button(
+                label=f"{label} ({suffix})",
+                icon=":material/download:",
+                data=create_file(file_format, (key, *params), df),
+                file_name=f"{filename}{suffix}",
+                mime=mime,
+            )
+
+
+@st.cache_data(show_spinner="Measuring import times...")
+def get_import_times(modules: list[str]) -> pd.DataFrame:
+    return measure_import_times(modules)
+
+
+def import_time_report():
+    """Import-time breakdown of the page dependencies in the sidebar (debug mode)."""
+    with st.sidebar.expander("Import times"):
+        import_times = get_import_times(PAGE_IMPORTS)
+        top_level = import_times.loc[import_times["depth"] == 0]
+        st.dataframe(
+            top_level.set_index("module")[["cumulative [ms]"]],
+            use_container_width=True,
         )
+        st.dataframe(import_times.head(50), hide_index=True)
+
+
+@st.cache_resource(show_spinner=False)
+def start_cache_warm_up() -> WarmUp:
+    # once per server process, shared by all sessions
+    return start_warm_up("data/profiles")
+
+
+@st.fragment(run_every=1)
+def warm_up_progress(warm_up: WarmUp):
+    """Progress of the cache warm-up, updated every second."""
+    if warm_up.done():
+        return
+    st.progress(
+        warm_up.finished / warm_up.total,
+        text=f"Preparing data: {warm_up.finished}/{warm_up.total}",
+    )
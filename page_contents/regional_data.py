@@ -2,55 +2,64 @@
 """REgional data tab."""
 
 from datetime import datetime
-from pathlib import Path
 from typing import Literal
 
-import folium
-import folium.features
-import geopandas as gpd
 import pandas as pd
 import plotly.express as px
 import streamlit as st
-from streamlit_folium import st_folium
 
 from page_contents.components import download_excel_file
-from src.get_industry_data import get_industry_type_regional_distribution
+from src.downsampling import downsample
+from src.get_industry_data import (
+    get_industry_type_regional_distribution,
+    get_regional_scaling_matrix as compute_regional_scaling_matrix,
+)
+from src.load_generator.modul_3_IND_E import state_of_region
+from src.region_geometry_store import load_region_geojson, tolerance_for_zoom
+from src.synthetic_profile_store import (
+    open_profile_matrix,
+    slice_profile_matrix,
+    to_frame,
+)
 
-DATA_DIR = Path(__file__).parent.parent.resolve() / "data"
+MAP_CENTER = (51.1657, 10.4515)
+MAP_ZOOM = 6
 
 
-@st.cache_data
-def get_region_geometry_from_csv():
-    # Path to the CSV file containing the geometry data
-    file_path = DATA_DIR / "data_regions_KRS_2022-01-01.csv"
+@st.cache_resource
+def get_region_geojson(tolerance: int) -> str:
+    # pre-serialized GeoJSON in EPSG:4326, shared by all sessions
+    return load_region_geojson(tolerance)
 
-    # Load the CSV file into a pandas DataFrame
-    df = pd.read_csv(file_path, dtype={"id": str})
 
-    # Convert the 'geometry_epsg3035_500m' column to GeoDataFrame
-    gdf = gpd.GeoDataFrame(
-        df, geometry=gpd.GeoSeries.from_wkt(df["geometry_epsg3035_500m"])
-    )
+@st.cache_resource
+def get_synthetic_load_profile_matrix(state: str):
+    # memory-mapped, shared by all sessions, with the holidays of the state
+    return open_profile_matrix(2019, state)
 
-    # Set the CRS for the GeoDataFrame
-    gdf.crs = "EPSG:3035"
-    return gdf
+
+@st.cache_data
+def get_industry_data() -> pd.DataFrame:
+    return get_industry_type_regional_distribution()
 
 
 @st.cache_data
-def get_synthetic_load_profiles():
-    list_df = []
-    for ind in [1, 2, 3, 4, 5, 6, 7, 8, 9, 10, 11, 12, 13, 14]:
-        filename = f"data/profiles/load_profiles_2019_{ind}.csv"
-        tmp = pd.read_csv(filename, usecols=[1, 2, 3, 4])
-        list_df.append(tmp)
-    df_all = pd.concat(list_df)
-    # Convert the timestamp column to datetime objects
-    df_all["time"] = pd.to_datetime(df_all["time"])
-    # aggregate end use types:
-    df_all = df_all.groupby(["time", "industry_id"])["value"].sum().reset_index()
+def get_regional_scaling_matrix(
+    split_by: Literal["n_cap", "n_sites"],
+) -> pd.DataFrame:
+    return compute_regional_scaling_matrix(split_by)
+
 
-    return df_all
+@st.cache_data
+def get_industry_type_names() -> dict[int, str]:
+    industry_data = get_industry_data()
+    return (
+        industry_data[["sector_agg_id", "sector_agg"]]
+        .drop_duplicates()
+        .set_index("sector_agg_id")
+        .squeeze()
+        .to_dict()
+    )
 
 
 @st.cache_data()
@@ -59,56 +68,45 @@ def get_regional_synthetic_load_profiles(
     split_by: Literal["n_cap", "n_sites"],
     dates: tuple[str, str] | None = None,
 ):
-    load_profiles = get_synthetic_load_profiles().set_index("time")
+    time, values, industry_ids = get_synthetic_load_profile_matrix(
+        state_of_region(region_id)
+    )
     if dates is not None:
-        load_profiles = load_profiles.loc[dates[0] : dates[1], :]
+        time, values = slice_profile_matrix(time, values, *dates)
+    load_profiles = to_frame(time, values, industry_ids)
 
-    industry_data = get_industry_type_regional_distribution()
+    # industry types with sites in the region:
+    scaling_factors = get_regional_scaling_matrix(split_by).loc[region_id].dropna()
 
-    industry_type_id_mapping = (
-        industry_data[["sector_agg_id", "sector_agg"]]
-        .drop_duplicates()
-        .set_index("sector_agg_id")
-        .squeeze()
-        .to_dict()
+    out = (
+        (load_profiles[scaling_factors.index] * scaling_factors)
+        .melt(ignore_index=False, var_name="industry_id", value_name="value")
+        .reset_index()
     )
-
-    scaled_load_profiles = []
-    for industry_number in [1, 2, 3, 4, 5, 6, 7, 8, 9, 10, 11, 12, 13, 14]:
-        sector_data = industry_data.loc[
-            industry_data["sector_agg_id"] == industry_number
-        ]
-        if (sector_data["id"] == region_id).any():
-            quantity_in_region = sector_data.loc[
-                (sector_data["id"] == region_id),
-                split_by,
-            ].iloc[0]
-            quantity_over_all_regions = sector_data[split_by].sum()
-            scaling_factor = quantity_in_region / quantity_over_all_regions
-            scaled_profile = load_profiles.loc[
-                (load_profiles["industry_id"] == industry_number), :
-            ].assign(value=lambda x: x["value"] * scaling_factor)
-
-            scaled_load_profiles.append(scaled_profile)
-
-    out = pd.concat(scaled_load_profiles).reset_index()
-    out["industry_id"] = out["industry_id"].map(industry_type_id_mapping)
+    out["industry_id"] = out["industry_id"].map(get_industry_type_names())
     return out
 
 
-def create_map(gdf, df_select, split_by):
+def create_map(df_select, split_by):
+    import folium
+    import folium.features
+    from streamlit_folium import st_folium
+
+    # the level of detail of the geometry follows the zoom of the map
+    zoom = (st.session_state.get("map") or {}).get("zoom") or MAP_ZOOM
+
     # Create a blank folium map centered at Germany
     # remove the tiles=None parameter to show  OSM street map
     m = folium.Map(
-        location=[51.1657, 10.4515],
-        zoom_start=6,
+        location=MAP_CENTER,
+        zoom_start=MAP_ZOOM,
         control_scale=True,
         background_color="white",
     )
 
     # Create a choropleth layer to fill areas with colors based on 'area_m2'
     choropleth = folium.Choropleth(
-        geo_data=gdf,
+        geo_data=get_region_geojson(tolerance_for_zoom(zoom)),
         data=df_select,
         columns=["id", split_by],
         key_on="feature.properties.id",
@@ -137,20 +135,31 @@ def create_map(gdf, df_select, split_by):
 
     tooltip.add_to(choropleth.geojson)
 
-    choropleth.add_to(m)
+    # the regions are sent as a feature group, so the base map is not reloaded
+    # and keeps its view; the legend is drawn next to the map
+    regions = folium.FeatureGroup(name="regions")
+    choropleth.geojson.add_to(regions)
+    st.html(choropleth.color_scale._repr_html_())
 
     # Display the choropleth map using folium_static
-    st.session_state["map"] = st_folium(m, width=600, height=800)
+    # only zooming reruns the fragment, panning stays on the client
+    st.session_state["map"] = st_folium(
+        m,
+        width=600,
+        height=800,
+        feature_group_to_add=regions,
+        returned_objects=["zoom"],
+    )
 
 
 @st.fragment()
-def map_and_widget(gdf, industry_data):
+def map_and_widget(industry_data):
     list_wz = industry_data.sector_agg.unique().tolist()
     list_wz.sort()
     wz_select = st.selectbox("Select industry type for map", list_wz)
     df_select = industry_data.loc[industry_data.sector_agg == wz_select]
     # create map:
-    create_map(gdf, df_select, st.session_state["split_by"])
+    create_map(df_select, st.session_state["split_by"])
     st.dataframe(
         df_select.set_index("name")
         .sort_index()[[st.session_state["split_by"]]]
@@ -183,8 +192,14 @@ def regional_profile_with_date_range_widget():
     )
     # transfrom unit to [MW]
     regional_profiles["value"] = regional_profiles["value"] * 1e-3
+    regional_profiles_wide = regional_profiles.pivot(
+        index="time", columns="industry_id", values="value"
+    )
+    # only min/max per time bucket is plotted, the data below has full resolution
     fig = px.area(
-        regional_profiles,
+        downsample(regional_profiles_wide)
+        .melt(ignore_index=False, value_name="value")
+        .reset_index(),
         x="time",
         y="value",
         color="industry_id",
@@ -192,14 +207,15 @@ def regional_profile_with_date_range_widget():
     )
     st.plotly_chart(fig, use_container_width=True)
     with st.expander("Data"):
-        regional_profiles_wide = regional_profiles.pivot(
-            index="time", columns="industry_id", values="value"
-        )
         st.dataframe(regional_profiles_wide, use_container_width=True)
         download_excel_file(
-            f"synthetic-load-profiles-{st.session_state['region_id']}-{st.session_state['split_by']}.xlsx",
+            f"synthetic-load-profiles-{st.session_state['region_id']}-{st.session_state['split_by']}",
             regional_profiles_wide,
-            "Download table as .xlsx",
+            params=(
+                st.session_state["region_id"],
+                st.session_state["split_by"],
+                date_range,
+            ),
         )
 
 
@@ -209,15 +225,7 @@ st.write(
     "On this page, synthetic load data is disaggregated to a specific region based on the number of employees or number of production sites in the respective region."
 )
 
-# load cap and site data from database:
-cap_and_site_data = pd.read_csv(DATA_DIR / "cap_and_site_data.csv", dtype={"id": str})
-
-# load weights for transforming to industry types:
-shares = pd.read_csv(DATA_DIR / "industry_type_2_wz2008_shares.csv")
-
-# load geometry:
-gdf = get_region_geometry_from_csv()
-industry_data = get_industry_type_regional_distribution()
+industry_data = get_industry_data()
 region_names = {k: v for k, v in zip(industry_data["id"], industry_data["name"])}
 
 st.sidebar.header("Settings")
@@ -269,7 +277,9 @@ with st.container(border=True):
     regional_profile_with_date_range_widget()
 
 with st.expander("Regional distribution of selected disaggregation parameter"):
-    map_and_widget(gdf, industry_data)
+    # the map (and its GIS dependencies) is only loaded when requested
+    if st.toggle("Show map", key="show-map"):
+        map_and_widget(industry_data)
 
 # this placeholder is needed at the bottom of the page to prevent scroll-jumping
 # during widget interaction in the interactive figure
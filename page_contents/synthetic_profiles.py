@@ -4,15 +4,12 @@
 from datetime import datetime
 
 import plotly.express as px
+import plotly.graph_objects as go
 import streamlit as st
 
 from page_contents.components import download_excel_file
-from src.load_generator import (
-    modul_1_IND_E,
-    modul_2_IND_E,
-    modul_3_IND_E,
-    modul_4_IND_E,
-)
+from src.downsampling import downsample
+from src.load_generator import ensemble, modul_1_IND_E, pipeline
 
 st.title("Generate synthetic load data")
 
@@ -39,80 +36,61 @@ industry_number = int(
 )
 
 
-# """Ausführen von Modul 1:
-# Normierte Lastprofile pro Typtag"""
-(
-    weekday_1,
-    saturday_1,
-    sunday_1,
-    holiday_1,
-    constant_1,
-    data_industry_type,
-) = modul_1_IND_E.modul_1_el(industry_number, PROFILES_DATA_PATH)
+data_industry_type = all_info_wz[all_info_wz.industry_number.eq(industry_number)]
 
 with settings_container:
-    cols = st.columns(4)
+    cols = st.columns(5)
     with cols[0]:
-        data_industry_type["Fluktuation"] = st.select_slider(
+        fluctuation = st.select_slider(
             "Fluctuation",
             range(0, 100),
             value=data_industry_type["Fluktuation"].values[0],
         )
     with cols[1]:
-        data_industry_type["Energieverbrauch 2019"] = st.number_input(
+        energy = st.number_input(
             "Energy consumption",
             value=data_industry_type["Energieverbrauch 2019"].values[0],
         )
     with cols[2]:
-        data_industry_type["Peak_faktor"] = st.number_input(
+        peak_faktor = st.number_input(
             "Peak factor",
             value=data_industry_type["Peak_faktor"].values[0],
         )
     with cols[3]:
-        data_industry_type["Base_faktor"] = st.number_input(
+        base_faktor = st.number_input(
             "Base factor:",
             value=data_industry_type["Base_faktor"].values[0],
         )
+    with cols[4]:
+        seed = st.number_input(
+            "Seed",
+            min_value=0,
+            value=0,
+            step=1,
+            help="Seed of the random fluctuation, the same seed gives the same profile",
+        )
 
 industry_type = data_industry_type["WZ_ID"][industry_number]
 
-# """Ausführen von Modul 2:
-# Anpassung in vertikaler Richtung, Strecken und Stauchen
-# anhand base_ und peak_faktoren"""
-weekday_2, saturday_2, sunday_2, holiday_2, constant_2 = modul_2_IND_E.modul_2(
-    year,
-    industry_number,
-    data_industry_type,
-    weekday_1,
-    saturday_1,
-    sunday_1,
-    holiday_1,
-    constant_1,
+# """Ausführen von Modul 1 bis 4:
+# Normierte Lastprofile pro Typtag, Strecken und Stauchen anhand base_ und
+# peak_faktoren, Zusammensetzen zum Jahreslastgang, Skalieren auf
+# Jahresverbrauch und Aufprägung der Fluktuationen"""
+# nur die Stufen, deren Parameter sich geändert haben, werden neu berechnet
+profile_pipeline = st.session_state.setdefault(
+    "profile-pipeline", pipeline.IncrementalPipeline()
 )
-
-# """Ausführen von Modul 3:
-# Zusammensetzen der Tageslastgänge zu Lastgang 1 Jahr, Normierung
-# auf Verbrauch von 1000 MWh/a"""
-year_list, array_load_type = modul_3_IND_E.modul_3(year)
-df = modul_3_IND_E.seasonality(
+df_year_4 = profile_pipeline.run(
+    industry_number,
     year,
-    year_list,
-    array_load_type,
-    weekday_2,
-    saturday_2,
-    sunday_2,
-    holiday_2,
-    constant_2,
     PROFILES_DATA_PATH,
+    fluctuation=fluctuation,
+    energy=energy,
+    peak_faktor=peak_faktor,
+    base_faktor=base_faktor,
+    seed=seed,
 )
 
-df_year_3 = modul_3_IND_E.normalising_1000(df)
-
-# """Ausführen von Modul 4:
-# Skalieren auf Jahresverbrauch und Aufprägung der Fluktuationen"""
-df_year_4 = modul_4_IND_E.modul_4(year, industry_number, df_year_3, data_industry_type)
-df_year_4 = modul_4_IND_E.modul_4_fluct(industry_number, df_year_4, data_industry_type)
-
 st.header("Germany wide load profile")
 with st.container(border=True):
     date_range = st.slider(
@@ -124,10 +102,13 @@ with st.container(border=True):
         label_visibility="hidden",
     )
 
+    # only min/max per time bucket is plotted, the data below has full resolution
     fig = px.area(
-        df_year_4.drop("Total", axis=1)
-        .multiply(1e-3)
-        .loc[date_range[0] : date_range[1], :],
+        downsample(
+            df_year_4.drop("Total", axis=1)
+            .multiply(1e-3)
+            .loc[date_range[0] : date_range[1], :]
+        ),
         title=f"{industry_name} (WZ {industry_type})",
         labels={"value": "MW", "index": "Time", "variable": "End use type"},
     )
@@ -135,10 +116,82 @@ with st.container(border=True):
     with st.expander("Data"):
         st.dataframe(df_year_4 * 1e-3, use_container_width=True)
         download_excel_file(
-            f"synthetic-load-profiles-germany-{industry_name.lower().replace(' ', '')}.xlsx",
+            f"synthetic-load-profiles-germany-{industry_name.lower().replace(' ', '')}",
             df_year_4,
-            "Download table as .xlsx",
+            params=(
+                industry_number,
+                year,
+                fluctuation,
+                energy,
+                peak_faktor,
+                base_faktor,
+                seed,
+            ),
+        )
+
+st.header("Monte Carlo ensemble of the fluctuation")
+with st.container(border=True):
+    st.write(
+        "Percentile bands of the total load and distribution of the annual peak "
+        "over many random realizations of the fluctuation."
+    )
+    n_realizations = st.number_input(
+        "Number of realizations", min_value=10, max_value=10000, value=1000, step=100
+    )
+    if st.toggle("Run ensemble", key="run-ensemble"):
+        bands, peaks = ensemble.ensemble_statistics(
+            industry_number,
+            year,
+            PROFILES_DATA_PATH,
+            n_realizations=n_realizations,
+            seed=seed,
+            fluctuation=fluctuation,
+            energy=energy,
+            peak_faktor=peak_faktor,
+            base_faktor=base_faktor,
+        )
+        bands_plot = downsample(
+            bands.multiply(1e-3).loc[date_range[0] : date_range[1], :], stacked=False
+        )
+        fig = go.Figure(
+            [
+                go.Scatter(
+                    x=bands_plot.index,
+                    y=bands_plot["P95"],
+                    name="P95",
+                    line={"width": 0},
+                ),
+                go.Scatter(
+                    x=bands_plot.index,
+                    y=bands_plot["P5"],
+                    name="P5 - P95",
+                    fill="tonexty",
+                    line={"width": 0},
+                ),
+                go.Scatter(x=bands_plot.index, y=bands_plot["P50"], name="P50"),
+            ]
+        )
+        fig.update_layout(
+            title=f"Total load, {n_realizations} realizations",
+            yaxis_title="MW",
+            xaxis_title="Time",
         )
+        st.plotly_chart(fig, use_container_width=True)
+
+        cols = st.columns([1, 2])
+        with cols[0]:
+            st.dataframe(
+                ensemble.peak_statistics(peaks * 1e-3).rename("Annual peak [MW]"),
+                use_container_width=True,
+            )
+        with cols[1]:
+            fig = px.histogram(
+                peaks * 1e-3,
+                labels={"value": "Annual peak [MW]"},
+                title="Distribution of the annual peak",
+            )
+            fig.update_layout(showlegend=False)
+            st.plotly_chart(fig, use_container_width=True)
 
 # this placeholder is needed at the bottom of the page to prevent scroll-jumping
 # during widget interaction in the interactive figure
@@ -0,0 +1,54 @@
+"""Min/max downsampling of time series for plotting.
+
+The time axis is cut into equal buckets and in each bucket the rows holding the
+minimum and the maximum of every series are kept. All series keep the same rows,
+so stacked area charts still line up, and every local extremum that is larger
+than a bucket - in particular the peak of each series - is plotted exactly.
+"""
+
+import numpy as np
+import pandas as pd
+
+# points per series that are sent to the browser
+MAX_POINTS = 4000
+
+
+def minmax_indices(
+    values: np.ndarray, max_points: int = MAX_POINTS, stacked: bool = True
+) -> np.ndarray:
+    """Sorted row indices of a (time x series) array to keep for plotting.
+
+    At most ``max_points`` rows are returned. With ``stacked`` the row sums are
+    treated as additional series, so the peak of a stacked chart stays exact.
+    """
+    values = np.asarray(values, dtype=float).reshape(len(values), -1)
+    if stacked:
+        values = np.column_stack([values, values.sum(axis=1)])
+    n_rows, n_series = values.shape
+    # first and last row plus minimum and maximum of every series per bucket
+    n_buckets = max(1, (max_points - 2) // (2 * n_series))
+    if n_rows <= max_points or n_rows <= 2 * n_buckets:
+        return np.arange(n_rows)
+
+    bucket_size = -(-n_rows // n_buckets)
+    n_buckets = -(-n_rows // bucket_size)
+    padded = np.full((n_buckets * bucket_size, n_series), np.nan)
+    padded[:n_rows] = values
+    buckets = padded.reshape(n_buckets, bucket_size, n_series)
+    # the padding only fills the last bucket, which holds at least one row
+    offsets = np.arange(n_buckets)[:, np.newaxis] * bucket_size
+    indices = np.concatenate(
+        [
+            (np.nanargmin(buckets, axis=1) + offsets).ravel(),
+            (np.nanargmax(buckets, axis=1) + offsets).ravel(),
+            [0, n_rows - 1],
+        ]
+    )
+    return np.unique(indices)
+
+
+def downsample(
+    df: pd.DataFrame, max_points: int = MAX_POINTS, stacked: bool = True
+) -> pd.DataFrame:
+    """Rows of a wide (time x series) frame selected by minmax_indices."""
+    return df.iloc[minmax_indices(df.to_numpy(), max_points, stacked)]
@@ -0,0 +1,172 @@
+"""Bulk export of the synthetic load profiles of all regions.
+
+The profiles of all regions x industry types x time steps are computed in chunks
+of regions that fit into a fixed memory budget, each region from the profiles
+with the holidays of its Bundesland (see synthetic_profile_store). They are
+written either to a memory-mapped float32 ``.npy`` array (with a ``.json`` sidecar
+describing the axes) or to Parquet files partitioned by region
+(``region_id=<id>/``)::
+
+    python -m src.export_regional_profiles --split-by n_cap --output regional.npy
+    python -m src.export_regional_profiles --output regional_profiles/ --format parquet
+"""
+
+import argparse
+import json
+from collections.abc import Iterator
+from pathlib import Path
+from typing import Literal
+
+import numpy as np
+import pandas as pd
+
+from src.get_industry_data import (
+    get_industry_type_regional_distribution,
+    get_scaling_matrix,
+)
+from src.load_generator.modul_3_IND_E import STATE_BY_AGS_PREFIX, state_of_region
+from src.synthetic_profile_store import load_profile_frame
+
+DEFAULT_MEMORY_BUDGET_MB = 512
+
+
+def iter_regional_chunks(
+    load_profiles: dict[str, pd.DataFrame],
+    scaling_matrix: pd.DataFrame,
+    memory_budget: int = DEFAULT_MEMORY_BUDGET_MB * 2**20,
+) -> Iterator[tuple[pd.Index, np.ndarray]]:
+    """Yield region ids and their (region x industry type x time) float32 profiles.
+
+    ``load_profiles`` holds the (time x industry type) profiles per Bundesland,
+    every region is scaled from the profiles of its state. The number of regions
+    per chunk is chosen so that a chunk does not exceed ``memory_budget`` bytes.
+    """
+    states = list(load_profiles)
+    # Bundesland x Industrietyp x Zeit
+    profiles = np.stack(
+        [
+            load_profiles[state][scaling_matrix.columns].to_numpy(np.float32).T
+            for state in states
+        ]
+    )
+    region_states = np.array(
+        [states.index(state_of_region(region_id)) for region_id in scaling_matrix.index]
+    )
+    factors = scaling_matrix.fillna(0).to_numpy(np.float32)
+
+    chunk_size = max(1, memory_budget // profiles[0].nbytes)
+    for start in range(0, len(scaling_matrix), chunk_size):
+        chunk = slice(start, start + chunk_size)
+        values = profiles[region_states[chunk]]
+        values *= factors[chunk, :, np.newaxis]
+        yield scaling_matrix.index[chunk], values
+
+
+def export_npy(
+    path: Path,
+    load_profiles: dict[str, pd.DataFrame],
+    scaling_matrix: pd.DataFrame,
+    memory_budget: int = DEFAULT_MEMORY_BUDGET_MB * 2**20,
+):
+    """Write all regional profiles to a (region x industry x time) ``.npy`` array.
+
+    Chunks are appended to the file one after another, so only one chunk is held
+    in memory. Open the result memory-mapped with open_npy.
+    """
+    path = Path(path)
+    time = next(iter(load_profiles.values())).index
+    shape = (len(scaling_matrix), len(scaling_matrix.columns), len(time))
+    with open(path, "wb") as f:
+        np.lib.format.write_array_header_1_0(
+            f,
+            {
+                "descr": np.lib.format.dtype_to_descr(np.dtype(np.float32)),
+                "fortran_order": False,
+                "shape": shape,
+            },
+        )
+        for _, values in iter_regional_chunks(
+            load_profiles, scaling_matrix, memory_budget
+        ):
+            values.tofile(f)
+
+    metadata = {
+        "region_id": scaling_matrix.index.tolist(),
+        "industry_id": scaling_matrix.columns.tolist(),
+        "time": {
+            "start": time[0].isoformat(),
+            "periods": len(time),
+            "freq": pd.infer_freq(time),
+        },
+    }
+    path.with_suffix(".json").write_text(json.dumps(metadata, indent=2))
+
+
+def open_npy(path: Path) -> tuple[np.memmap, dict]:
+    """Open an array written by export_npy read-only, without loading it."""
+    path = Path(path)
+    metadata = json.loads(path.with_suffix(".json").read_text())
+    metadata["time"] = pd.date_range(**metadata["time"])
+    return np.load(path, mmap_mode="r"), metadata
+
+
+def export_parquet(
+    directory: Path,
+    load_profiles: dict[str, pd.DataFrame],
+    scaling_matrix: pd.DataFrame,
+    memory_budget: int = DEFAULT_MEMORY_BUDGET_MB * 2**20,
+):
+    """Write one (time x industry type) Parquet file per region."""
+    directory = Path(directory)
+    time = next(iter(load_profiles.values())).index
+    columns = [str(industry_id) for industry_id in scaling_matrix.columns]
+    for region_ids, values in iter_regional_chunks(
+        load_profiles, scaling_matrix, memory_budget
+    ):
+        for region_id, region_values in zip(region_ids, values):
+            partition = directory / f"region_id={region_id}"
+            partition.mkdir(parents=True, exist_ok=True)
+            pd.DataFrame(region_values.T, index=time, columns=columns).to_parquet(
+                partition / "part-0.parquet"
+            )
+
+
+def export_regional_profiles(
+    output: Path,
+    split_by: Literal["n_cap", "n_sites"] = "n_cap",
+    file_format: Literal["npy", "parquet"] = "npy",
+    year: int = 2019,
+    memory_budget: int = DEFAULT_MEMORY_BUDGET_MB * 2**20,
+):
+    """Export the profiles of all regions and industry types."""
+    load_profiles = {
+        state: load_profile_frame(year, state) for state in STATE_BY_AGS_PREFIX.values()
+    }
+    scaling_matrix = get_scaling_matrix(
+        get_industry_type_regional_distribution(), split_by
+    )
+    export = export_npy if file_format == "npy" else export_parquet
+    export(output, load_profiles, scaling_matrix, memory_budget)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--output", required=True, help=".npy file or directory")
+    parser.add_argument("--format", choices=["npy", "parquet"], default="npy")
+    parser.add_argument("--split-by", choices=["n_cap", "n_sites"], default="n_cap")
+    parser.add_argument("--year", type=int, default=2019)
+    parser.add_argument(
+        "--memory-budget",
+        type=int,
+        default=DEFAULT_MEMORY_BUDGET_MB,
+        help="memory per chunk in MB",
+    )
+    args = parser.parse_args()
+
+    export_regional_profiles(
+        args.output,
+        split_by=args.split_by,
+        file_format=args.format,
+        year=args.year,
+        memory_budget=args.memory_budget * 2**20,
+    )
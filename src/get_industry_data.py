@@ -1,11 +1,21 @@
 """Disaggregation of a german profile to a single county."""
 
 from pathlib import Path
+from typing import Literal
 
 import pandas as pd
 
+from src.load_generator import cache
+from src.load_generator.cache import cached
+from src.load_generator.profile_store import content_version
+
 DATA_DIR = Path(__file__).parent.parent.resolve() / "data"
 
+# Eingaben der regionalen Verteilung in DATA_DIR
+REGIONAL_SOURCES = ["cap_and_site_data.csv", "industry_type_2_wz2008_shares.csv"]
+
+INDUSTRY_TYPE_IDS = [1, 2, 3, 4, 5, 6, 7, 8, 9, 10, 11, 12, 13, 14]
+
 
 def transform_data_to_industry_types(
     cap_and_site_data: pd.DataFrame, shares: pd.DataFrame
@@ -44,15 +54,67 @@ def transform_data_to_industry_types(
     return transformed
 
 
-def get_industry_type_regional_distribution() -> pd.DataFrame:
+def regional_data_version(data_dir: Path) -> str:
+    """Hash of the content of the regional input files in data_dir."""
+    return content_version({name: Path(data_dir) / name for name in REGIONAL_SOURCES})
+
+
+# Cache-Schlüssel hängen vom Inhalt der regionalen Eingaben ab
+cache.register_version("data_dir", regional_data_version)
+
+
+@cached
+def get_industry_type_regional_distribution(data_dir: Path = DATA_DIR) -> pd.DataFrame:
     # load cap and site data from database:
     cap_and_site_data = pd.read_csv(
-        DATA_DIR / "cap_and_site_data.csv", dtype={"id": str}
+        Path(data_dir) / "cap_and_site_data.csv", dtype={"id": str}
     )
 
     # load weights for transforming to industry types:
-    shares = pd.read_csv(DATA_DIR / "industry_type_2_wz2008_shares.csv")
+    shares = pd.read_csv(Path(data_dir) / "industry_type_2_wz2008_shares.csv")
 
     # transform data from wz2008 categories to industry types:
     industry_types = transform_data_to_industry_types(cap_and_site_data, shares)
     return industry_types
+
+
+def load_synthetic_load_profiles(year: int = 2019) -> pd.DataFrame:
+    """German synthetic load profiles as (time x industry type) frame.
+
+    End use types are aggregated, the columns are the industry type ids.
+    """
+    list_df = []
+    for ind in INDUSTRY_TYPE_IDS:
+        filename = DATA_DIR / "profiles" / f"load_profiles_{year}_{ind}.csv"
+        tmp = pd.read_csv(filename, usecols=[1, 2, 3, 4])
+        list_df.append(tmp)
+    df_all = pd.concat(list_df)
+    # Convert the timestamp column to datetime objects
+    df_all["time"] = pd.to_datetime(df_all["time"])
+    # aggregate end use types:
+    return df_all.groupby(["time", "industry_id"])["value"].sum().unstack()
+
+
+def get_scaling_matrix(
+    industry_types: pd.DataFrame, split_by: Literal["n_cap", "n_sites"]
+) -> pd.DataFrame:
+    """Share of each region in the national total of each industry type.
+
+    Returns a (region x industry type) matrix with the region ids as index and the
+    industry type numbers (sector_agg_id) as columns. Industry types without
+    sites in a region are NaN.
+    """
+    quantities = industry_types.pivot(
+        index="id", columns="sector_agg_id", values=split_by
+    )
+    return quantities / quantities.sum()
+
+
+@cached
+def get_regional_scaling_matrix(
+    split_by: Literal["n_cap", "n_sites"], data_dir: Path = DATA_DIR
+) -> pd.DataFrame:
+    """Scaling matrix of the regional distribution of all industry types."""
+    return get_scaling_matrix(
+        get_industry_type_regional_distribution(data_dir), split_by
+    )
@@ -0,0 +1,45 @@
+"""Import-time breakdown in the style of ``python -X importtime``."""
+
+import subprocess
+import sys
+from pathlib import Path
+
+import pandas as pd
+
+ROOT_DIR = Path(__file__).parent.parent.resolve()
+
+
+def measure_import_times(modules: list[str]) -> pd.DataFrame:
+    """Import modules in a fresh interpreter and parse its ``-X importtime`` report.
+
+    Returns one row per imported module with its own and cumulative import time
+    in ms and its nesting depth, sorted by cumulative time.
+    """
+    result = subprocess.run(
+        [
+            sys.executable,
+            "-X",
+            "importtime",
+            "-c",
+            "; ".join(f"import {module}" for module in modules),
+        ],
+        cwd=ROOT_DIR,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+
+    rows = []
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line.removeprefix("import time:").split("|")
+        rows.append(
+            {
+                "module": name.strip(),
+                "self [ms]": int(self_us) / 1000,
+                "cumulative [ms]": int(cumulative_us) / 1000,
+                "depth": (len(name) - len(name.lstrip()) - 1) // 2,
+            }
+        )
+    return pd.DataFrame(rows).sort_values("cumulative [ms]", ascending=False)
@@ -0,0 +1,54 @@
+# -*- coding: utf-8 -*-
+"""Generate the IND-E load profile of an industry type from the command line.
+
+python -m src.load_generator --industry 3 --year 2019 --output profile.csv
+"""
+
+import argparse
+
+from src.load_generator import cache, pipeline
+
+parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+parser.add_argument("--industry", type=int, required=True, help="industry_number")
+parser.add_argument("--year", type=int, default=2019)
+parser.add_argument("--data-path", default="data/profiles")
+parser.add_argument("--fluctuation", type=float)
+parser.add_argument("--energy", type=float, help="in 1000 MWh/a")
+parser.add_argument("--peak-faktor", type=float)
+parser.add_argument("--base-faktor", type=float)
+parser.add_argument("--no-fluctuation", action="store_true")
+parser.add_argument("--seed", type=int, help="seed of the fluctuation")
+parser.add_argument("--cache", choices=sorted(cache.BACKENDS), default="none")
+parser.add_argument("--cache-dir", help="directory of the disk cache")
+parser.add_argument("--cache-max-mb", type=int, help="size limit of the disk cache")
+parser.add_argument("--output", required=True, help=".csv, .parquet or .xlsx file")
+args = parser.parse_args()
+
+if args.cache == "disk":
+    options = {}
+    if args.cache_dir:
+        options["directory"] = args.cache_dir
+    if args.cache_max_mb:
+        options["max_bytes"] = args.cache_max_mb * 2**20
+    cache.configure("disk", **options)
+else:
+    cache.configure(args.cache)
+
+df_year_4 = pipeline.generate_profile(
+    args.industry,
+    args.year,
+    args.data_path,
+    fluctuation=args.fluctuation,
+    energy=args.energy,
+    peak_faktor=args.peak_faktor,
+    base_faktor=args.base_faktor,
+    with_fluctuation=not args.no_fluctuation,
+    seed=args.seed,
+)
+
+if args.output.endswith(".parquet"):
+    df_year_4.to_parquet(args.output)
+elif args.output.endswith(".xlsx"):
+    df_year_4.to_excel(args.output)
+else:
+    df_year_4.to_csv(args.output)
@@ -0,0 +1,414 @@
+# -*- coding: utf-8 -*-
+"""Batch generation of the IND-E profiles of several industry types at once.
+
+The calendar, the HDD factors and the day-type templates are loaded once and
+shared by all industry types. modul_1 to modul_4 then run as array operations
+with the industry type as leading axis. Write all industry types to Parquet with::
+
+    python -m src.load_generator.batch --year 2019 --output profiles_2019.parquet
+
+Several years are generated and written one year at a time, e.g. with a projection
+of the energy consumption (see read_projection)::
+
+    python -m src.load_generator.batch --year 2019 --last-year 2050 \\
+        --projection projection.csv --output profiles_2019_2050.parquet
+
+Scenario grids (years x peak/base factors x energy factors) are spread over a
+pool of worker processes, see run_scenarios. The profiles get a column
+"scenario", and the scenarios are written next to the output file with the
+suffix replaced by ``.scenarios.csv`` (here ``scenarios_2019_2030.scenarios.csv``)::
+
+    python -m src.load_generator.batch --year 2019 --last-year 2030 \\
+        --projection projection.csv --peak-faktor 1.2 1.4 1.6 \\
+        --base-faktor 0.4 0.6 --workers 32 --output scenarios_2019_2030.parquet
+"""
+
+import argparse
+import os
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing.shared_memory import SharedMemory
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from src.load_generator import (
+    modul_1_IND_E,
+    modul_2_IND_E,
+    modul_3_IND_E,
+    modul_4_IND_E,
+)
+
+INDUSTRY_NUMBERS = list(range(1, 15))
+
+COLUMNS = [*modul_1_IND_E.END_USE_TYPES, "Total"]
+
+
+def generate_industry_profiles(
+    industry_numbers,
+    year,
+    data_path,
+    fluctuation=False,
+    state=None,
+    energy=None,
+    seed=None,
+    peak_faktor=None,
+    base_faktor=None,
+):
+    """Yearly profiles of several industry types as array (industry x time x column).
+
+    Equivalent to running modul_1_el, modul_2, modul_3/seasonality,
+    normalising_1000 and modul_4 (and modul_4_fluct if ``fluctuation`` is set)
+    once per industry type. ``state`` selects the holidays of a Bundesland
+    (see modul_3_IND_E.working_days). ``energy`` overrides the yearly energy
+    consumption per industry type (in 1000 MWh/a), which is otherwise taken from
+    the column "Energieverbrauch <year>" of the industry type table. ``seed``
+    makes the fluctuation reproducible (see modul_4_IND_E.fluctuation_rng).
+    ``peak_faktor`` and ``base_faktor`` override the factors of the table (one
+    value for all or one per industry type). Returns the array, the 15-minute DatetimeIndex and the column names.
+    """
+    all_info_wz = modul_1_IND_E.get_industry_type_data(data_path)
+    data_industry_types = all_info_wz.set_index("industry_number").loc[industry_numbers]
+
+    # modul_1: Anwendungsprofile * Anteile der Anwendungen, Typtage x 96 x Anwendung
+    templates = np.stack(
+        [
+            day_type.to_numpy(dtype=float)
+            for day_type in modul_1_IND_E.get_day_type_templates_el(data_path)
+        ]
+    )
+    shares = data_industry_types[modul_1_IND_E.END_USE_TYPES].to_numpy(dtype=float)
+    day_types_1 = templates * shares[:, np.newaxis, np.newaxis, :]
+    day_types_1 = np.concatenate(
+        [day_types_1, day_types_1.sum(axis=-1, keepdims=True)], axis=-1
+    )
+
+    # modul_2: Strecken und Stauchen
+    if peak_faktor is None:
+        peak_faktor = data_industry_types["Peak_faktor"]
+    if base_faktor is None:
+        base_faktor = data_industry_types["Base_faktor"]
+    day_types_2 = modul_2_IND_E.rescale_day_types(
+        day_types_1,
+        np.broadcast_to(np.asarray(peak_faktor, dtype=float), len(industry_numbers)),
+        np.broadcast_to(np.asarray(base_faktor, dtype=float), len(industry_numbers)),
+    )
+
+    # modul_3 / seasonality: Kalender und HDD-Faktoren für alle Industrietypen
+    year_list, array_load_type = modul_3_IND_E.modul_3(year, state)
+    month_factor = modul_3_IND_E.get_month_factors(data_path)
+    months = pd.DatetimeIndex(year_list).month.to_numpy()
+    profiles = modul_3_IND_E.assemble_year(
+        day_types_2[:, modul_3_IND_E.LOAD_TYPE_DAY_TYPES],
+        array_load_type,
+        month_factor[months - 1],
+        COLUMNS.index("Raumwärme"),
+    )
+
+    # normalising_1000 und modul_4: Skalieren auf den Jahresverbrauch
+    energy_per_year_3 = profiles[..., -1].sum(axis=-1) * 0.25 / 1000
+    if energy is None:
+        energy = data_industry_types["Energieverbrauch " + str(year)]
+    energy_per_year_MWh = np.asarray(energy, dtype=float)
+    profiles = profiles / (energy_per_year_3 / 1000)[:, np.newaxis, np.newaxis]
+    profiles = profiles * energy_per_year_MWh[:, np.newaxis, np.newaxis]
+    profiles = profiles.round(0)
+
+    if fluctuation:
+        # modul_4_fluct: Fluktuation auf mechanische Antriebe und Gesamtlast
+        s_norm = data_industry_types["Fluktuation"].to_numpy(dtype=float)
+        power_peak = np.max(profiles[..., -1], axis=-1)
+        s_abs = modul_4_IND_E.fluctuation_std(s_norm, power_peak)
+        rand_numbers = np.stack(
+            [
+                modul_4_IND_E.fluctuation_noise(
+                    modul_4_IND_E.fluctuation_rng(seed, industry_number),
+                    s_abs_industry,
+                    profiles.shape[1],
+                )
+                for industry_number, s_abs_industry in zip(industry_numbers, s_abs)
+            ]
+        )
+        profiles[..., COLUMNS.index("Mechanische Antriebe")] += rand_numbers
+        profiles[..., -1] += rand_numbers
+
+    idx = pd.date_range(str(year), periods=profiles.shape[1], freq="15min")
+    return profiles, idx, list(COLUMNS)
+
+
+def to_long_format(profiles, idx, columns, industry_numbers):
+    """Tidy frame (time, industry_id, end_use_type, value) without the total."""
+    end_use_types = [c for c in columns if c != "Total"]
+    values = profiles[..., [columns.index(c) for c in end_use_types]]
+    n_industries, n_steps, n_end_use_types = values.shape
+    return pd.DataFrame(
+        {
+            "time": np.tile(np.repeat(idx.to_numpy(), n_end_use_types), n_industries),
+            "industry_id": np.repeat(industry_numbers, n_steps * n_end_use_types),
+            "end_use_type": np.tile(end_use_types, n_industries * n_steps),
+            "value": values.reshape(-1),
+        }
+    )
+
+
+def read_projection(path):
+    """Projected energy consumption (1000 MWh/a) per industry type and year.
+
+    The CSV file has a column "industry_number" and one column per year.
+    """
+    projection = pd.read_csv(path, index_col="industry_number")
+    projection.columns = projection.columns.astype(int)
+    return projection
+
+
+def missing_energy_years(industry_numbers, years, data_path, projection=None):
+    """Years without energy consumption for all industry types.
+
+    The energy is taken from ``projection`` (see read_projection) if given,
+    otherwise from the column "Energieverbrauch <year>" of the industry type
+    table, which only exists for the base year.
+    """
+    if projection is not None:
+        covered = projection.reindex(index=industry_numbers).notna().all()
+        return [year for year in years if not covered.get(year, False)]
+    all_info_wz = modul_1_IND_E.get_industry_type_data(data_path)
+    return [
+        year for year in years if "Energieverbrauch " + str(year) not in all_info_wz
+    ]
+
+
+def iter_yearly_profiles(
+    industry_numbers,
+    years,
+    data_path,
+    projection=None,
+    fluctuation=False,
+    state=None,
+    seed=None,
+):
+    """Generate the profiles of several years, one year at a time.
+
+    Yields ``(year, profiles, idx, columns)`` as returned by
+    generate_industry_profiles, using the calendar of each year and, if given,
+    the energy consumption of that year from ``projection`` (see read_projection).
+    The fluctuation of each year is seeded with ``(seed, year)``. Only one year
+    is kept in memory. Raises ValueError before the first year if the energy of
+    any year is missing (see missing_energy_years).
+    """
+    missing = missing_energy_years(industry_numbers, years, data_path, projection)
+    if missing:
+        raise ValueError(f"no energy consumption for the years {missing}")
+    for year in years:
+        energy = None
+        if projection is not None:
+            energy = projection.loc[industry_numbers, year]
+        yield (
+            year,
+            *generate_industry_profiles(
+                industry_numbers,
+                year,
+                data_path,
+                fluctuation=fluctuation,
+                state=state,
+                energy=energy,
+                seed=None if seed is None else (seed, year),
+            ),
+        )
+
+
+def scenario_grid(
+    years, peak_faktors=(np.nan,), base_faktors=(np.nan,), energy_factors=(1.0,)
+):
+    """All combinations of years, peak/base factors and energy factors.
+
+    NaN factors keep the values of the industry type table, the energy factor
+    scales the energy consumption of the year. The row index is the scenario id.
+    """
+    grid = pd.MultiIndex.from_product(
+        [years, peak_faktors, base_faktors, energy_factors],
+        names=["year", "peak_faktor", "base_faktor", "energy_factor"],
+    )
+    return grid.to_frame(index=False).rename_axis("scenario")
+
+
+def _generate_into(buffer_name, industry_numbers, year, data_path, **options):
+    # Worker: Profile in den gemeinsamen Speicher schreiben statt sie zu picklen
+    profiles, idx, _ = generate_industry_profiles(
+        industry_numbers, year, data_path, **options
+    )
+    buffer = SharedMemory(buffer_name)
+    try:
+        np.ndarray(profiles.shape, profiles.dtype, buffer=buffer.buf)[:] = profiles
+    finally:
+        buffer.close()
+    return len(idx)
+
+
+def run_scenarios(
+    scenarios,
+    industry_numbers,
+    data_path,
+    projection=None,
+    fluctuation=False,
+    state=None,
+    seed=None,
+    max_workers=None,
+):
+    """Generate the profiles of each scenario in a pool of worker processes.
+
+    ``scenarios`` is a frame as returned by scenario_grid. Yields
+    ``(scenario, profiles, idx, columns)`` in the order of the scenarios, like
+    iter_yearly_profiles, while the workers keep generating the next scenarios.
+    The energy consumption is taken from ``projection`` (see read_projection) or
+    the industry type table and scaled with the energy factor. The fluctuation
+    is seeded with ``(seed, year)``, so scenarios of the same year share their
+    noise and year-only scenarios equal iter_yearly_profiles.
+
+    The workers write into a ring of shared memory buffers, one per worker plus two, so
+    only the scenario parameters and the number of time steps are pickled and
+    memory stays bounded by the number of workers. Raises ValueError before
+    starting the workers if the energy of any year is missing (see
+    missing_energy_years).
+    """
+    years = scenarios["year"].unique().tolist()
+    missing = missing_energy_years(industry_numbers, years, data_path, projection)
+    if missing:
+        raise ValueError(f"no energy consumption for the years {missing}")
+    max_workers = max_workers or os.cpu_count() or 1
+    all_info_wz = modul_1_IND_E.get_industry_type_data(data_path)
+    data_industry_types = all_info_wz.set_index("industry_number").loc[industry_numbers]
+    # größtes Jahr: 366 Tage
+    shape = (len(industry_numbers), 366 * 96, len(COLUMNS))
+    size = int(np.prod(shape)) * np.dtype(float).itemsize
+    buffers = [SharedMemory(create=True, size=size) for _ in range(max_workers + 2)]
+    executor = ProcessPoolExecutor(max_workers)
+    try:
+        free = deque(buffers)
+        pending = deque()
+        rows = scenarios.itertuples()
+        while True:
+            while free and (row := next(rows, None)) is not None:
+                if projection is not None:
+                    energy = projection.loc[industry_numbers, row.year]
+                else:
+                    energy = data_industry_types["Energieverbrauch " + str(row.year)]
+                buffer = free.popleft()
+                future = executor.submit(
+                    _generate_into,
+                    buffer.name,
+                    industry_numbers,
+                    row.year,
+                    data_path,
+                    fluctuation=fluctuation,
+                    state=state,
+                    energy=np.asarray(energy, dtype=float) * row.energy_factor,
+                    seed=None if seed is None else (seed, row.year),
+                    peak_faktor=None if np.isnan(row.peak_faktor) else row.peak_faktor,
+                    base_faktor=None if np.isnan(row.base_faktor) else row.base_faktor,
+                )
+                pending.append((row, buffer, future))
+            if not pending:
+                break
+
+            row, buffer, future = pending.popleft()
+            n_steps = future.result()
+            view = np.ndarray((shape[0], n_steps, shape[2]), buffer=buffer.buf)
+            profiles = view.copy()
+            del view  # der Puffer darf keine offenen Views mehr haben
+            free.append(buffer)
+            idx = pd.date_range(str(row.year), periods=n_steps, freq="15min")
+            yield row.Index, profiles, idx, list(COLUMNS)
+    finally:
+        executor.shutdown(cancel_futures=True)
+        for buffer in buffers:
+            buffer.close()
+            buffer.unlink()
+
+
+def write_long_format(yearly_profiles, path, industry_numbers, key=None):
+    """Stream the output of iter_yearly_profiles to a Parquet or CSV file.
+
+    Each year is converted to_long_format and appended to the file (as row group
+    for Parquet), so memory stays bounded by one year regardless of the horizon.
+    With ``key`` the first element of each item (e.g. the scenario of
+    run_scenarios) is written to a column of that name.
+    """
+    path = Path(path)
+
+    def long_format(item):
+        df = to_long_format(*item[1:], industry_numbers)
+        if key is not None:
+            df.insert(0, key, item[0])
+        return df
+
+    if path.suffix == ".parquet":
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        writer = None
+        try:
+            for item in yearly_profiles:
+                table = pa.Table.from_pandas(long_format(item), preserve_index=False)
+                if writer is None:
+                    writer = pq.ParquetWriter(path, table.schema)
+                writer.write_table(table)
+        finally:
+            if writer is not None:
+                writer.close()
+    else:
+        header = True
+        for item in yearly_profiles:
+            long_format(item).to_csv(
+                path, mode="w" if header else "a", header=header, index=False
+            )
+            header = False
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--year", type=int, default=2019)
+    parser.add_argument("--last-year", type=int, help="generate --year to --last-year")
+    parser.add_argument("--industries", type=int, nargs="+", default=INDUSTRY_NUMBERS)
+    parser.add_argument("--data-path", default="data/profiles")
+    parser.add_argument("--projection", help="CSV file, see read_projection")
+    parser.add_argument("--fluctuation", action="store_true")
+    parser.add_argument("--state", help="Bundesland for holidays, e.g. BY")
+    parser.add_argument("--seed", type=int, help="seed of the fluctuation")
+    parser.add_argument("--peak-faktor", type=float, nargs="+", help="scenario grid")
+    parser.add_argument("--base-faktor", type=float, nargs="+", help="scenario grid")
+    parser.add_argument("--energy-factor", type=float, nargs="+", help="scenario grid")
+    parser.add_argument("--workers", type=int, help="number of worker processes")
+    parser.add_argument("--output", required=True, help="Parquet or CSV file")
+    args = parser.parse_args()
+
+    years = range(args.year, (args.last_year or args.year) + 1)
+    projection = args.projection and read_projection(args.projection)
+    missing = missing_energy_years(args.industries, years, args.data_path, projection)
+    if missing:
+        parser.error(f"no energy consumption for the years {missing}, use --projection")
+    options = dict(fluctuation=args.fluctuation, state=args.state, seed=args.seed)
+    if args.workers or args.peak_faktor or args.base_faktor or args.energy_factor:
+        scenarios = scenario_grid(
+            years,
+            args.peak_faktor or [np.nan],
+            args.base_faktor or [np.nan],
+            args.energy_factor or [1.0],
+        )
+        scenarios.to_csv(Path(args.output).with_suffix(".scenarios.csv"))
+        items = run_scenarios(
+            scenarios,
+            args.industries,
+            args.data_path,
+            projection=projection,
+            max_workers=args.workers,
+            **options,
+        )
+        key = "scenario"
+    else:
+        items = iter_yearly_profiles(
+            args.industries, years, args.data_path, projection=projection, **options
+        )
+        key = None
+
+    write_long_format(items, args.output, args.industries, key=key)
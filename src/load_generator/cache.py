@@ -0,0 +1,249 @@
+# -*- coding: utf-8 -*-
+"""Pluggable result cache for the load generator.
+
+The pipeline functions (modul_1 to modul_4) are decorated with ``cached``. Where
+their results are kept is decided by the configured backend:
+
+- ``"none"``: no caching (default for scripts and batch workers)
+- ``"memory"``: in-memory LRU cache bounded to ``maxsize`` entries
+- ``"disk"``: pickle files in ``directory``, shared between processes (e.g.
+  several Streamlit replicas and batch workers), bounded to ``max_bytes``
+
+Select the backend in code with ``configure("memory", maxsize=256)`` or via the
+environment variables ``IND_E_CACHE`` (backend), ``IND_E_CACHE_SIZE``,
+``IND_E_CACHE_DIR`` and ``IND_E_CACHE_MAX_MB``. Like ``st.cache_data``, every
+cache hit returns a fresh copy of the result, so callers may modify it.
+
+Keys are content addressed: a hash of CACHE_VERSION, the function, its arguments
+and the version of the input data (see register_version), so a changed workbook
+never returns stale results, also not from the disk cache of another process.
+"""
+
+import functools
+import hashlib
+import inspect
+import os
+import pickle
+import threading
+from collections import OrderedDict
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from src.load_generator.fileio import atomic_write
+
+
+# Version des Generator-Codes in allen Schlüsseln. Bei jeder Änderung, nach der
+# eine gecachte Funktion für dieselben Argumente ein anderes Ergebnis liefert
+# (oder das Format der Ergebnisse ändert), erhöhen.
+CACHE_VERSION = 1
+
+
+class NullCache:
+    """Backend that never stores anything."""
+
+    def get(self, key):
+        raise KeyError(key)
+
+    def set(self, key, value):
+        pass
+
+
+class MemoryCache:
+    """In-memory LRU cache with at most ``maxsize`` entries."""
+
+    def __init__(self, maxsize=128):
+        self.maxsize = maxsize
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            data = self._entries[key]
+            self._entries.move_to_end(key)
+        return pickle.loads(data)
+
+    def set(self, key, value):
+        data = pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL)
+        with self._lock:
+            self._entries[key] = data
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+class DiskCache:
+    """Pickle files in ``directory``, one per entry.
+
+    Entries are written atomically, so several processes can share the
+    directory. With ``max_bytes`` the least recently used entries (by mtime,
+    which is updated on every hit) are removed when the cache grows larger.
+    """
+
+    def __init__(self, directory=".cache/ind_e", max_bytes=None):
+        self.directory = Path(directory)
+        self.max_bytes = max_bytes
+
+    def _path(self, key):
+        return self.directory / f"{key}.pkl"
+
+    def get(self, key):
+        path = self._path(key)
+        try:
+            with open(path, "rb") as f:
+                value = pickle.load(f)
+        except (OSError, EOFError, pickle.UnpicklingError):
+            raise KeyError(key) from None
+        try:
+            os.utime(path)  # zuletzt verwendet
+        except OSError:
+            pass
+        return value
+
+    def set(self, key, value):
+        self.directory.mkdir(parents=True, exist_ok=True)
+        atomic_write(
+            self._path(key),
+            lambda f: pickle.dump(value, f, protocol=pickle.HIGHEST_PROTOCOL),
+        )
+        if self.max_bytes is not None:
+            self.evict(self.max_bytes)
+
+    def evict(self, max_bytes):
+        """Remove the least recently used entries until at most max_bytes are left."""
+        entries = []
+        for path in self.directory.glob("*.pkl"):
+            try:
+                stat = path.stat()
+            except FileNotFoundError:
+                continue  # von einem anderen Prozess entfernt
+            entries.append((stat.st_mtime_ns, stat.st_size, path))
+        size = sum(entry_size for _, entry_size, _ in entries)
+        for _, entry_size, path in sorted(entries):
+            if size <= max_bytes:
+                break
+            path.unlink(missing_ok=True)
+            size -= entry_size
+
+    def clear(self):
+        for path in self.directory.glob("*.pkl"):
+            path.unlink(missing_ok=True)
+
+
+BACKENDS = {"none": NullCache, "memory": MemoryCache, "disk": DiskCache}
+
+_backend = NullCache()
+_config = ("none", {})
+
+
+def configure(backend="none", **options):
+    """Select the cache backend for all cached functions.
+
+    Calling it again with the same arguments keeps the existing cache, so it is
+    safe to call on every Streamlit rerun.
+    """
+    global _backend, _config
+    if (backend, options) != _config:
+        _backend = BACKENDS[backend](**options)
+        _config = (backend, options)
+    return _backend
+
+
+def get_backend():
+    return _backend
+
+
+def _configure_from_environment():
+    backend = os.environ.get("IND_E_CACHE", "none")
+    options = {}
+    if backend == "memory" and "IND_E_CACHE_SIZE" in os.environ:
+        options["maxsize"] = int(os.environ["IND_E_CACHE_SIZE"])
+    if backend == "disk" and "IND_E_CACHE_DIR" in os.environ:
+        options["directory"] = os.environ["IND_E_CACHE_DIR"]
+    if backend == "disk" and "IND_E_CACHE_MAX_MB" in os.environ:
+        options["max_bytes"] = int(os.environ["IND_E_CACHE_MAX_MB"]) * 2**20
+    configure(backend, **options)
+
+
+# Versionen der Eingabedaten je Argumentname, z.B. "data_path"
+_versions = {}
+
+
+def register_version(argument, version):
+    """Add ``version(value)`` of an argument to the keys of all cached functions.
+
+    E.g. ``register_version("data_path", data_version)`` makes the keys depend on
+    the content of the input data in ``data_path``, not only on its name.
+    """
+    _versions[argument] = version
+
+
+def _update_hash(h, value):
+    if isinstance(value, (pd.DataFrame, pd.Series)):
+        h.update(type(value).__name__.encode())
+        if isinstance(value, pd.DataFrame):
+            meta = (value.columns.tolist(), value.dtypes.astype(str).tolist())
+        else:
+            meta = (value.name, str(value.dtype))
+        h.update(pickle.dumps(meta))
+        h.update(pd.util.hash_pandas_object(value, index=True).to_numpy().tobytes())
+    elif isinstance(value, np.ndarray):
+        h.update(pickle.dumps((value.dtype.str, value.shape)))
+        h.update(np.ascontiguousarray(value).tobytes())
+    elif isinstance(value, np.generic):
+        # numpy scalars (e.g. from a DataFrame) share keys with Python scalars
+        _update_hash(h, value.item())
+    elif isinstance(value, (list, tuple)):
+        h.update(f"{type(value).__name__}{len(value)}".encode())
+        for item in value:
+            _update_hash(h, item)
+    elif isinstance(value, dict):
+        h.update(f"dict{len(value)}".encode())
+        for item in sorted(value.items(), key=lambda item: repr(item[0])):
+            _update_hash(h, item)
+    else:
+        h.update(pickle.dumps(value))
+
+
+def make_key(func, arguments):
+    """Hash of CACHE_VERSION, a function and its (bound) arguments."""
+    h = hashlib.sha256(
+        f"{CACHE_VERSION}:{func.__module__}.{func.__qualname__}".encode()
+    )
+    _update_hash(h, arguments)
+    return h.hexdigest()
+
+
+def cached(func):
+    """Cache the results of ``func`` in the configured backend."""
+    signature = inspect.signature(func)
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        backend = _backend
+        if isinstance(backend, NullCache):
+            return func(*args, **kwargs)
+
+        bound = signature.bind(*args, **kwargs)
+        bound.apply_defaults()
+        arguments = dict(bound.arguments)
+        for argument in signature.parameters.keys() & _versions.keys():
+            arguments[f"{argument}:version"] = _versions[argument](arguments[argument])
+        key = make_key(func, arguments)
+        try:
+            return backend.get(key)
+        except KeyError:
+            pass
+        result = func(*args, **kwargs)
+        backend.set(key, result)
+        return result
+
+    return wrapper
+
+
+_configure_from_environment()
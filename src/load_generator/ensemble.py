@@ -0,0 +1,134 @@
+# -*- coding: utf-8 -*-
+"""Monte Carlo ensemble of the fluctuation of modul_4_fluct.
+
+N realizations of the fluctuated profile are drawn in blocks of ``block_size``
+realizations (block x time float32 arrays) and reduced on the fly, so memory does
+not grow with N:
+
+- quantile bands of the total load per time step from a histogram of the noise
+  (in units of its standard deviation, ``HIST_BINS`` bins over +-``HIST_RANGE``)
+- the annual peak of every realization
+
+Realization 0 is the profile of pipeline.generate_profile with the same seed.
+"""
+
+import numpy as np
+import pandas as pd
+
+from src.load_generator import modul_4_IND_E, pipeline
+from src.load_generator.cache import cached
+
+BLOCK_SIZE = 64
+
+HIST_RANGE = 6.0  # in Standardabweichungen
+HIST_BINS = 240
+
+QUANTILES = (0.05, 0.5, 0.95)
+
+
+def histogram_quantiles(counts, quantiles, edges):
+    """Quantiles per row of a (rows x bins) histogram, interpolated within bins."""
+    cumulative = counts.cumsum(axis=1)
+    total = cumulative[:, -1:]
+    result = []
+    for q in quantiles:
+        target = q * total
+        # erster Bin, in dem die kumulierte Häufigkeit das Ziel erreicht
+        i = (cumulative < target).sum(axis=1, keepdims=True)
+        i = np.minimum(i, counts.shape[1] - 1)
+        below = np.take_along_axis(cumulative, i, axis=1) - np.take_along_axis(
+            counts, i, axis=1
+        )
+        in_bin = np.take_along_axis(counts, i, axis=1)
+        fraction = np.divide(
+            target - below, in_bin, out=np.zeros(target.shape), where=in_bin > 0
+        )
+        result.append((edges[i] + fraction * np.diff(edges)[0])[:, 0])
+    return np.stack(result, axis=1)
+
+
+@cached
+def ensemble_statistics(
+    industry_number,
+    year,
+    data_path,
+    n_realizations=1000,
+    seed=0,
+    quantiles=QUANTILES,
+    fluctuation=None,
+    energy=None,
+    peak_faktor=None,
+    base_faktor=None,
+    block_size=BLOCK_SIZE,
+):
+    """Quantile bands of the total load and the distribution of the annual peak.
+
+    The parameters are those of pipeline.generate_profile. Returns a frame with
+    one column per quantile ("P5", "P50", ...) and "Mean" of the total load (kW)
+    per time step, and a Series with the annual peak (kW) of each realization.
+    """
+    df_year_4 = pipeline.generate_profile(
+        industry_number,
+        year,
+        data_path,
+        fluctuation=fluctuation,
+        energy=energy,
+        peak_faktor=peak_faktor,
+        base_faktor=base_faktor,
+        with_fluctuation=False,
+    )
+    data_industry_type = pipeline.industry_type_data(
+        industry_number, year, data_path, fluctuation=fluctuation
+    )
+    total = df_year_4["Total"].to_numpy()
+    n_steps = len(total)
+    s_abs = modul_4_IND_E.fluctuation_std(
+        data_industry_type["Fluktuation"][industry_number], np.max(total)
+    )
+
+    rng = modul_4_IND_E.fluctuation_rng(seed, industry_number)
+    edges = np.linspace(-HIST_RANGE, HIST_RANGE, HIST_BINS + 1)
+    counts = np.zeros((n_steps, HIST_BINS), dtype=np.uint32)
+    offsets = np.arange(n_steps) * HIST_BINS
+    noise_sum = np.zeros(n_steps)
+    peaks = np.empty(n_realizations)
+
+    for start in range(0, n_realizations, block_size):
+        n_block = min(block_size, n_realizations - start)
+        # gleiche Zufallsfolge wie modul_4_fluct, Realisierung für Realisierung
+        noise = modul_4_IND_E.fluctuation_noise(rng, s_abs, n_block * n_steps)
+        noise = noise.reshape(n_block, n_steps)
+
+        peaks[start : start + n_block] = (total + noise).max(axis=1)
+        noise_sum += noise.sum(axis=0, dtype=np.float64)
+
+        scaled = noise / np.float32(s_abs) if s_abs > 0 else noise
+        bins = ((scaled + HIST_RANGE) * (HIST_BINS / (2 * HIST_RANGE))).astype(np.intp)
+        np.clip(bins, 0, HIST_BINS - 1, out=bins)
+        counts += (
+            np.bincount((bins + offsets).ravel(), minlength=n_steps * HIST_BINS)
+            .reshape(n_steps, HIST_BINS)
+            .astype(np.uint32)
+        )
+
+    noise_quantiles = histogram_quantiles(counts, quantiles, edges) * s_abs
+    bands = pd.DataFrame(
+        total[:, np.newaxis] + noise_quantiles,
+        index=df_year_4.index,
+        columns=[f"P{q * 100:g}" for q in quantiles],
+    )
+    bands["Mean"] = total + noise_sum / n_realizations
+    return bands, pd.Series(peaks, name="peak").rename_axis("realization")
+
+
+def peak_statistics(peaks, quantiles=QUANTILES):
+    """Mean, standard deviation and quantiles of the annual peaks."""
+    return pd.Series(
+        {
+            "Mean": peaks.mean(),
+            "Std": peaks.std(),
+            **{f"P{q * 100:g}": peaks.quantile(q) for q in quantiles},
+            "Max": peaks.max(),
+        },
+        name="peak",
+    )
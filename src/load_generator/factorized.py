@@ -0,0 +1,181 @@
+# -*- coding: utf-8 -*-
+"""Factorized representation of yearly IND-E profiles.
+
+A yearly profile (without fluctuation) is built from five day-type templates, the
+load type of every day (modul_3) and twelve monthly HDD factors (seasonality). So
+every day equals one of at most 5 x 12 distinct day profiles. FactorizedProfile
+keeps only these day profiles and the index of the day profile of every day;
+sums, peaks and resampling are computed on the day profiles, and rows are only
+materialized for the requested window. Scaling a profile (e.g. to a region)
+shares the day profiles::
+
+    profile = factorize_profile(3, 2019, "data/profiles")
+    regional = profile * 0.02
+    regional["2019-01-07":"2019-01-13"]  # DataFrame of one week
+"""
+
+import numpy as np
+import pandas as pd
+
+from src.load_generator import modul_1_IND_E, modul_3_IND_E, pipeline
+from src.load_generator.cache import cached
+
+STEPS_PER_DAY = 96
+FREQ = pd.Timedelta("15min")
+
+
+class FactorizedProfile:
+    """15-minute profile given as distinct day profiles and a day index.
+
+    day_profiles is an array (day profile x 96 x column), day_index holds for
+    every day of the profile (starting at ``start``) the position of its day
+    profile. All values are multiplied with ``scale``.
+    """
+
+    def __init__(self, day_profiles, day_index, start, columns, scale=1.0):
+        self.day_profiles = day_profiles
+        self.day_index = day_index
+        self.start = pd.Timestamp(start)
+        self.columns = pd.Index(columns)
+        self.scale = scale
+
+    def __len__(self):
+        return len(self.day_index) * STEPS_PER_DAY
+
+    def __mul__(self, factor):
+        return FactorizedProfile(
+            self.day_profiles,
+            self.day_index,
+            self.start,
+            self.columns,
+            self.scale * factor,
+        )
+
+    __rmul__ = __mul__
+
+    @property
+    def index(self):
+        return pd.date_range(self.start, periods=len(self), freq=FREQ)
+
+    @property
+    def nbytes(self):
+        return self.day_profiles.nbytes + self.day_index.nbytes
+
+    def _step(self, timestamp, side):
+        steps = (pd.Timestamp(timestamp) - self.start) / FREQ
+        step = int(np.floor(steps)) + 1 if side == "right" else int(np.ceil(steps))
+        return min(max(step, 0), len(self))
+
+    def materialize(self, start=None, end=None):
+        """DataFrame of the rows between start and end (both inclusive)."""
+        first = 0 if start is None else self._step(start, "left")
+        last = len(self) if end is None else self._step(end, "right")
+        first_day = first // STEPS_PER_DAY
+        last_day = -(-last // STEPS_PER_DAY)
+
+        days = self.day_profiles[self.day_index[first_day:last_day]]
+        values = days.reshape(-1, days.shape[-1])
+        offset = first_day * STEPS_PER_DAY
+        values = values[first - offset : last - offset]
+        if self.scale != 1.0:
+            values = values * self.scale
+        return pd.DataFrame(
+            values,
+            index=pd.date_range(
+                self.start + first * FREQ, periods=len(values), freq=FREQ
+            ),
+            columns=self.columns,
+        )
+
+    def __getitem__(self, key):
+        """Label-based slice of the time axis, like ``DataFrame.loc[start:end]``."""
+        if not isinstance(key, slice) or key.step is not None:
+            raise TypeError("FactorizedProfile supports only slices of timestamps")
+        return self.materialize(key.start, key.stop)
+
+    def _day_counts(self):
+        return np.bincount(self.day_index, minlength=len(self.day_profiles))
+
+    def sum(self):
+        """Sum over all time steps per column."""
+        day_sums = self.day_profiles.sum(axis=1)
+        return pd.Series(self._day_counts() @ day_sums * self.scale, index=self.columns)
+
+    def max(self):
+        """Peak per column."""
+        used = self.day_profiles[self._day_counts() > 0]
+        peak = used.max(axis=(0, 1)) if self.scale >= 0 else used.min(axis=(0, 1))
+        return pd.Series(peak * self.scale, index=self.columns)
+
+    def idxmax(self):
+        """Time of the (first) peak per column."""
+        values = self.day_profiles * np.sign(self.scale or 1.0)
+        # Position des Maximums je Tagesprofil, dann erster Tag mit dem größten
+        steps = values.argmax(axis=1)
+        peaks = np.take_along_axis(values, steps[:, np.newaxis], axis=1)[:, 0]
+        days = peaks[self.day_index].argmax(axis=0)
+        positions = days * STEPS_PER_DAY + steps[self.day_index[days], range(len(days))]
+        return pd.Series(self.start + positions * FREQ, index=self.columns)
+
+    def resample_mean(self, freq):
+        """Mean over periods of ``freq`` (a divisor of a day, e.g. "h", or "D")."""
+        steps = pd.Timedelta(pd.tseries.frequencies.to_offset(freq)) // FREQ
+        if steps <= 0 or STEPS_PER_DAY % steps:
+            raise ValueError(f"{freq} does not divide a day into 15-minute steps")
+        day_profiles = self.day_profiles.reshape(
+            len(self.day_profiles), STEPS_PER_DAY // steps, steps, -1
+        ).mean(axis=2)
+        days = day_profiles[self.day_index]
+        return pd.DataFrame(
+            days.reshape(-1, days.shape[-1]) * self.scale,
+            index=pd.date_range(
+                self.start, periods=len(self.day_index) * days.shape[1], freq=freq
+            ),
+            columns=self.columns,
+        )
+
+
+@cached
+def factorize_profile(
+    industry_number,
+    year,
+    data_path,
+    energy=None,
+    peak_faktor=None,
+    base_faktor=None,
+    state=None,
+):
+    """Factorized profile equal to pipeline.generate_profile without fluctuation."""
+    day_types_2 = pipeline.day_types(
+        industry_number, year, data_path, peak_faktor, base_faktor
+    )
+    columns = day_types_2[0].columns
+    day_types = np.stack([day_type.to_numpy(dtype=float) for day_type in day_types_2])
+    day_types = day_types[modul_3_IND_E.LOAD_TYPE_DAY_TYPES]
+
+    # modul_3 / seasonality: jeder Tag ist durch (Lasttyp, Monat) bestimmt
+    days, array_load_type = modul_3_IND_E.calendar(year, state=state)
+    month_factor = modul_3_IND_E.get_month_factors(data_path)
+    pairs = (array_load_type - 1) * 12 + (days.month.to_numpy() - 1)
+    unique_pairs, day_index = np.unique(pairs, return_inverse=True)
+    load_type, month = np.divmod(unique_pairs, 12)
+    day_profiles = modul_3_IND_E.assemble_year(
+        day_types[load_type][:, np.newaxis],
+        [1],
+        month_factor[month][:, np.newaxis],
+        columns.get_loc("Raumwärme"),
+    )
+
+    # normalising_1000 und modul_4, in derselben Reihenfolge der Rechenschritte
+    total = day_profiles[day_index, :, -1].ravel()
+    energy_per_year_3 = float(pd.Series(total).sum() * 0.25 / 1000)
+    if energy is None:
+        data_industry_type = modul_1_IND_E.get_industry_type_data(data_path)
+        energy = data_industry_type.set_index("industry_number").at[
+            industry_number, "Energieverbrauch " + str(year)
+        ]
+    day_profiles = (day_profiles / (energy_per_year_3 / 1000) * energy).round(0)
+
+    return FactorizedProfile(
+        day_profiles, day_index.astype(np.int8), f"{year}-01-01", columns
+    )
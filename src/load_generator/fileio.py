@@ -0,0 +1,32 @@
+# -*- coding: utf-8 -*-
+"""Atomic file writes for the stores and the disk cache."""
+
+import os
+import tempfile
+from pathlib import Path
+
+# mkstemp legt Dateien mit 0600 an; die fertigen Dateien sollen wie mit open()
+# erstellte Dateien die umask des Prozesses beachten (z.B. für andere Nutzer
+# eines gemeinsamen Cache-Verzeichnisses). Einmal beim Import gelesen, da
+# os.umask nur durch Setzen gelesen werden kann und nicht threadsicher ist.
+_UMASK = os.umask(0)
+os.umask(_UMASK)
+
+
+def atomic_write(path, write):
+    """Write via a temporary file so concurrent readers never see partial files.
+
+    ``write`` gets the temporary file opened in binary mode. The file replaces
+    ``path`` only if ``write`` succeeds, otherwise it is removed. The file gets
+    the permissions of a newly created file (0o666 minus the umask).
+    """
+    path = Path(path)
+    fd, tmp = tempfile.mkstemp(dir=path.parent, prefix=f".{path.name}.")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            write(f)
+        os.chmod(tmp, 0o666 & ~_UMASK)
+        os.replace(tmp, path)
+    except BaseException:
+        Path(tmp).unlink(missing_ok=True)
+        raise
@@ -5,17 +5,33 @@ Created on Tue Mar 30 15:52:10 2021.
 @author: asandhaa
 """
 
-from pathlib import Path
+import functools
 
+import numpy as np
 import pandas as pd
-import streamlit as st
 
+from src.load_generator import profile_store
+from src.load_generator.cache import cached
 
-@st.cache_data
+# Anwendungen (Spalten) der elektrischen Lastprofile
+END_USE_TYPES = [
+    "Raumwärme",
+    "Warmwasser",
+    "Prozesswärme",
+    "Klimakälte",
+    "Prozesskälte",
+    "Beleuchtung",
+    "IKT",
+    "Mechanische Antriebe",
+]
+
+
+@cached
 def get_industry_type_data(data_path):
     """Input 2: Tabelle mit allen Informationen zu Industrietypen."""
-    all_info_wz = pd.read_excel(
-        Path(data_path) / "Electrical" / "All_info_industry_types_electrical.xlsx",
+    all_info_wz = profile_store.read_excel(
+        data_path,
+        "Electrical/All_info_industry_types_electrical.xlsx",
         skipfooter=1,
     ).drop(0)
     all_info_wz.dropna(how="all", axis=0, inplace=True)
@@ -25,55 +41,49 @@ def get_industry_type_data(data_path):
     return all_info_wz
 
 
-@st.cache_data
-def modul_1_el(industry_number, data_path):
-    """Input 1: Normierte Tageslastprofile Load_profiles_enduser.xlsx."""
-    load_prof_enduser = pd.read_excel(
-        Path(data_path) / "Electrical" / "Load_profiles_enduser.xlsx",
-        usecols=("B:J"),
-        sheet_name="Week_day",
-    )
-    load_prof_enduser.drop("unstetige mech. Antriebe", axis=1, inplace=True)
-    load_prof_enduser.dropna(axis=0, inplace=True)
-    profiles_weekday = load_prof_enduser.rename(
-        columns={"stetige mech. Antriebe": "Mechanische Antriebe"}
-    )
+def get_day_type_templates_el(data_path):
+    """Input 1: Normierte Tageslastprofile Load_profiles_enduser.xlsx (je Typtag)."""
+    return _day_type_templates_el(data_path, profile_store.data_version(data_path))
+
+
+# Je Inhalt der Eingabedaten (version) gespeichert, damit eine geänderte
+# Arbeitsmappe auch in einem laufenden Prozess neu gelesen wird
+@functools.lru_cache(maxsize=4)
+def _day_type_templates_el(data_path, version):
+    sheets = profile_store.read_workbook(
+        data_path,
+        "Electrical/Load_profiles_enduser.xlsx",
+        profile_store.DAY_TYPE_SHEETS,
+        usecols="B:J",
+    )
+    templates = []
+    for load_prof_enduser in sheets.values():
+        load_prof_enduser = load_prof_enduser.drop("unstetige mech. Antriebe", axis=1)
+        load_prof_enduser.dropna(axis=0, inplace=True)
+        templates.append(
+            load_prof_enduser.rename(
+                columns={"stetige mech. Antriebe": "Mechanische Antriebe"}
+            )
+        )
 
-    load_prof_enduser = pd.read_excel(
-        Path(data_path) / "Electrical" / "Load_profiles_enduser.xlsx",
-        usecols=("B:J"),
-        sheet_name="Saturday",
-    )
-    load_prof_enduser.drop("unstetige mech. Antriebe", axis=1, inplace=True)
-    load_prof_enduser.dropna(axis=0, inplace=True)
-    profiles_saturday = load_prof_enduser.rename(
-        columns={"stetige mech. Antriebe": "Mechanische Antriebe"}
-    )
+    profiles_constant = templates[0].copy()
+    profiles_constant.loc[:, :] = 1
+    templates.append(profiles_constant)
 
-    load_prof_enduser = pd.read_excel(
-        Path(data_path) / "Electrical" / "Load_profiles_enduser.xlsx",
-        usecols=("B:J"),
-        sheet_name="Sunday",
-    )
-    load_prof_enduser.drop("unstetige mech. Antriebe", axis=1, inplace=True)
-    load_prof_enduser.dropna(axis=0, inplace=True)
-    profiles_sunday = load_prof_enduser.rename(
-        columns={"stetige mech. Antriebe": "Mechanische Antriebe"}
-    )
+    # weekday, saturday, sunday, holiday, constant
+    return tuple(templates)
 
-    load_prof_enduser = pd.read_excel(
-        Path(data_path) / "Electrical" / "Load_profiles_enduser.xlsx",
-        usecols=("B:J"),
-        sheet_name="Holiday",
-    )
-    load_prof_enduser.drop("unstetige mech. Antriebe", axis=1, inplace=True)
-    load_prof_enduser.dropna(axis=0, inplace=True)
-    profiles_holiday = load_prof_enduser.rename(
-        columns={"stetige mech. Antriebe": "Mechanische Antriebe"}
-    )
 
-    profiles_constant = profiles_weekday.copy()
-    profiles_constant.loc[:, :] = 1
+@cached
+def modul_1_el(industry_number, data_path):
+    """Input 1: Normierte Tageslastprofile Load_profiles_enduser.xlsx."""
+    (
+        profiles_weekday,
+        profiles_saturday,
+        profiles_sunday,
+        profiles_holiday,
+        profiles_constant,
+    ) = get_day_type_templates_el(data_path)
 
     """Input 2: Tabelle mit allen Informationen zu Industrietypen"""
 
@@ -85,16 +95,7 @@ def modul_1_el(industry_number, data_path):
         all_info_wz.industry_number.eq(industry_number)
     ]  # filters the row with specific industry_wz
     energy_enduser_industry_type = data_industry_type[
-        [
-            "Raumwärme",
-            "Warmwasser",
-            "Prozesswärme",
-            "Klimakälte",
-            "Prozesskälte",
-            "Beleuchtung",
-            "IKT",
-            "Mechanische Antriebe",
-        ]
+        END_USE_TYPES
     ].values  # extracts enduser values
     energy_enduser_industry_type = energy_enduser_industry_type.astype(float)
 
@@ -138,40 +139,57 @@ def modul_1_el(industry_number, data_path):
     return (weekday_1, saturday_1, sunday_1, holiday_1, constant_1, data_industry_type)
 
 
-def modul_1_th(industry_number, data_path):
-    """Input 1: Normierte Tageslastprofile Load_profiles_enduser.xlsx."""
-    profiles_weekday = pd.read_excel(
-        Path(data_path) / "Thermal" / "Load_profiles_daytypes.xlsx",
-        sheet_name="Week_day",
-        index_col=0,
-    )
-    profiles_saturday = pd.read_excel(
-        Path(data_path) / "Thermal" / "Load_profiles_daytypes.xlsx",
-        sheet_name="Saturday",
-        index_col=0,
-    )
-    profiles_sunday = pd.read_excel(
-        Path(data_path) / "Thermal" / "Load_profiles_daytypes.xlsx",
-        sheet_name="Sunday",
-        index_col=0,
-    )
-    profiles_holiday = pd.read_excel(
-        Path(data_path) / "Thermal" / "Load_profiles_daytypes.xlsx",
-        sheet_name="Holiday",
+def get_day_type_templates_th(data_path):
+    """Input 1: Normierte Tageslastprofile Load_profiles_daytypes.xlsx (je Typtag)."""
+    return _day_type_templates_th(data_path, profile_store.data_version(data_path))
+
+
+@functools.lru_cache(maxsize=4)
+def _day_type_templates_th(data_path, version):
+    sheets = profile_store.read_workbook(
+        data_path,
+        "Thermal/Load_profiles_daytypes.xlsx",
+        profile_store.DAY_TYPE_SHEETS,
         index_col=0,
     )
+    templates = list(sheets.values())
 
-    profiles_constant = profiles_weekday.copy()
+    profiles_constant = templates[0].copy()
     profiles_constant.loc[:, :] = 1
+    templates.append(profiles_constant)
 
-    """Input 2: Tabelle mit allen Informationen zu Industrietypen"""
+    # weekday, saturday, sunday, holiday, constant
+    return tuple(templates)
 
-    all_info_wz = pd.read_excel(
-        Path(data_path) / "Thermal" / "All_info_industry_types_thermal.xlsx".format()
+
+@cached
+def get_industry_type_data_th(data_path):
+    """Input 2: Tabelle mit allen Informationen zu Industrietypen (thermisch)."""
+    all_info_wz = profile_store.read_excel(
+        data_path, "Thermal/All_info_industry_types_thermal.xlsx"
     )
     all_info_wz.dropna(how="all", axis=0, inplace=True)
     all_info_wz.dropna(how="all", axis=1, inplace=True)
     all_info_wz.fillna(0, inplace=True)
+    return all_info_wz
+
+
+def stack_day_types_th(profiles, shares):
+    """Außenprodukt der Typtag-Profile (Typtag x 96) mit den Anteilen der
+    Temperaturbereiche, inkl. "Total" als letzter Spalte (Typtag x 96 x Spalte).
+    """
+    y = np.multiply.outer(np.asarray(profiles, dtype=float), np.asarray(shares, float))
+    return np.concatenate([y, y.sum(axis=-1, keepdims=True)], axis=-1)
+
+
+@cached
+def modul_1_th(industry_number, data_path):
+    """Input 1: Normierte Tageslastprofile Load_profiles_enduser.xlsx."""
+    templates = get_day_type_templates_th(data_path)
+
+    """Input 2: Tabelle mit allen Informationen zu Industrietypen"""
+
+    all_info_wz = get_industry_type_data_th(data_path)
 
     """Filtern der Infos für ausgewählten Industrietyp"""
 
@@ -185,53 +203,15 @@ def modul_1_th(industry_number, data_path):
 
     """ERSTELLUNG normierter Tageslastprofile"""
 
-    """WEEK DAY"""
-    y = pd.DataFrame(
-        index=profiles_weekday.index, columns=energy_enduser_industry_type.columns
+    # weekday, saturday, sunday, holiday, constant
+    day_types_1 = stack_day_types_th(
+        [template.iloc[:, 0] for template in templates],
+        energy_enduser_industry_type.iloc[0],
     )
-    for i in range(len(y.columns)):
-        y.iloc[:, i] = profiles_weekday * float(energy_enduser_industry_type.iloc[:, i])
-    y["Total"] = y.sum(axis=1)
-    weekday_1 = y
-
-    """SATURDAY"""
-    y = pd.DataFrame(
-        index=profiles_saturday.index, columns=energy_enduser_industry_type.columns
+    columns = [*energy_enduser_industry_type.columns, "Total"]
+    weekday_1, saturday_1, sunday_1, holiday_1, constant_1 = (
+        pd.DataFrame(values, index=template.index, columns=columns)
+        for values, template in zip(day_types_1, templates)
     )
-    for i in range(len(y.columns)):
-        y.iloc[:, i] = profiles_saturday * float(
-            energy_enduser_industry_type.iloc[:, i]
-        )
-    y["Total"] = y.sum(axis=1)
-    saturday_1 = y
-
-    """SUNDAY"""
-    y = pd.DataFrame(
-        index=profiles_sunday.index, columns=energy_enduser_industry_type.columns
-    )
-    for i in range(len(y.columns)):
-        y.iloc[:, i] = profiles_sunday * float(energy_enduser_industry_type.iloc[:, i])
-    y["Total"] = y.sum(axis=1)
-    sunday_1 = y
-
-    """HOLIDAY"""
-    y = pd.DataFrame(
-        index=profiles_holiday.index, columns=energy_enduser_industry_type.columns
-    )
-    for i in range(len(y.columns)):
-        y.iloc[:, i] = profiles_holiday * float(energy_enduser_industry_type.iloc[:, i])
-    y["Total"] = y.sum(axis=1)
-    holiday_1 = y
-
-    """CONSTANT"""
-    y = pd.DataFrame(
-        index=profiles_constant.index, columns=energy_enduser_industry_type.columns
-    )
-    for i in range(len(y.columns)):
-        y.iloc[:, i] = profiles_constant * float(
-            energy_enduser_industry_type.iloc[:, i]
-        )
-    y["Total"] = y.sum(axis=1)
-    constant_1 = y
 
     return weekday_1, saturday_1, sunday_1, holiday_1, constant_1, data_industry_type
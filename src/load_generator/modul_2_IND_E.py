@@ -7,10 +7,57 @@ Created on Fri Oct  1 10:18:40 2021
 
 import numpy as np
 import pandas as pd
-import streamlit as st
 
+from src.load_generator.cache import cached
 
-@st.cache_data
+# Fixpunkt (Zeitschritt) je Typtag, um den gestreckt bzw. gestaucht wird
+# Reihenfolge: weekday, saturday, sunday, holiday (constant hat keinen Fixpunkt)
+ANCHOR_STEPS = np.array([0, 0, 95, 0])
+
+
+def rescale_day_types(day_types, peak_faktor, base_faktor):
+    """Strecken/Stauchen aller Typtage in einem Schritt.
+
+    day_types ist ein Array (... x Typtag x 96 x Anwendung) in der Reihenfolge
+    weekday, saturday, sunday, holiday, constant. Die letzte Spalte ist "Total".
+    Führende Achsen (z.B. Industrietypen) werden mit peak_faktor und base_faktor
+    gebroadcastet. Rückgabe ist ein Array mit den angepassten Typtagen.
+    """
+    day_types = np.asarray(day_types, dtype=float)
+    total = day_types[..., -1]
+
+    # 1) Gesamtlast auf den Fixpunkt 0 versetzen
+    y = total[..., :4, :] - total[..., np.arange(4), ANCHOR_STEPS][..., np.newaxis]
+
+    # 2) Strecken bzw. Stauchen anhand der peak- und base-Faktoren
+    peak_ist = np.max(y[..., 0, :], axis=-1)
+    base_ist = np.min(y[..., 1, :], axis=-1)
+    peak_soll = (np.asarray(peak_faktor) - 1) * 100
+    base_soll = (np.asarray(base_faktor) - 1) * 100
+    peak_soll = np.where(peak_soll == -100, peak_ist, peak_soll)  # falls kein Faktor
+    base_soll = np.where(base_soll == -100, base_ist, base_soll)
+    peak_scale = peak_soll / peak_ist
+    base_scale = base_soll / base_ist
+    factors = np.stack(
+        np.broadcast_arrays(peak_scale, base_scale, base_scale, base_scale), axis=-1
+    )
+
+    # 3) Gesamtlast auf 100 kW Basislast versetzen, constant liegt konstant bei 100 + base_soll
+    total_soll = np.concatenate(
+        [
+            y * factors[..., np.newaxis] + 100,
+            np.zeros_like(y[..., :1, :])
+            + (100 + base_soll)[..., np.newaxis, np.newaxis],
+        ],
+        axis=-2,
+    )
+
+    # 4) Anwendungen anhand ihrer Anteile an der Gesamtlast wieder einfügen
+    day_types_2 = day_types / total[..., np.newaxis] * total_soll[..., np.newaxis]
+    return day_types_2.round(2)
+
+
+@cached
 def modul_2(
     year,
     industry_number,
@@ -30,84 +77,19 @@ def modul_2(
        in die Anwendungen aufgetrennt wird.
 
     """
-
-    """WEEK DAY"""
-    # Gesamtverbrauch
-    y = (
-        weekday_1["Total"] - weekday_1["Total"][0]
-    )  # Zeitreihe des Gesamtverbrauchs komplett versetzen, auf Startwert 0
-    peak_ist = np.max(y)  # peak_ist und peak_soll bestimmen
-    peak_soll = (
-        data_industry_type[data_industry_type["industry_number"] == industry_number][
-            "Peak_faktor"
-        ].iloc[0]
-        - 1
-    ) * 100
-    if peak_soll == -100:
-        peak_soll = peak_ist  # falls kein Faktor hinterlegt
-    weekday = y * (peak_soll / peak_ist)  # Strecken bzw. Stauchen
-    weekday = weekday + 100  # Zeitreihe komplett versetzen, auf Startwert 100
-
-    # Anwendungen wieder einfügen
-    weekday_2 = weekday_1.copy()  # Formate, Spaltennamen übernehmen
-    for i in range(len(weekday_2)):  # Anwendungen anpassen
-        weekday_2.iloc[i] = (
-            weekday_1.iloc[i] / weekday_1["Total"].iloc[i] * weekday[i]
-        )  # An jedem Zeitpunkt i wird der Anteil der Anwendung mit Gesamtverbrauch multipliziert
-    weekday_2 = weekday_2.round(2)
-
-    """SATURDAY"""
-    y = saturday_1["Total"] - saturday_1["Total"][0]
-    base_ist = np.min(y)
-    base_soll = (
-        data_industry_type[data_industry_type["industry_number"] == industry_number][
-            "Base_faktor"
-        ].iloc[0]
-        - 1
-    ) * 100
-    if base_soll == -100:
-        base_soll = base_ist
-    saturday = y * (base_soll / base_ist)
-    saturday = saturday + 100
-
-    saturday_2 = saturday_1.copy()
-    for i in range(len(saturday_2)):
-        saturday_2.iloc[i] = (
-            saturday_1.iloc[i] / saturday_1["Total"].iloc[i] * saturday[i]
-        )
-    saturday_2 = saturday_2.round(2)
-
-    """SUNDAY"""
-    y = sunday_1["Total"] - sunday_1["Total"][95]
-    sunday = y * (base_soll / base_ist)
-    sunday = sunday + 100
-
-    sunday_2 = sunday_1.copy()
-    for i in range(len(sunday_2)):
-        sunday_2.iloc[i] = sunday_1.iloc[i] / sunday_1["Total"].iloc[i] * sunday[i]
-    sunday_2 = sunday_2.round(2)
-
-    """HOLIDAY"""
-    y = holiday_1["Total"] - holiday_1["Total"][0]
-    holiday = y * (base_soll / base_ist)
-    holiday = holiday + 100
-
-    holiday_2 = holiday_1.copy()
-    for i in range(len(holiday_2)):
-        holiday_2.iloc[i] = holiday_1.iloc[i] / holiday_1["Total"].iloc[i] * holiday[i]
-    holiday_2 = holiday_2.round(2)
-
-    """CONSTANT HOLIDAY"""
-    # Die Methode weicht von den anderen ab, da die Verteilung der Anwendungen in jedem Punkt die gleiche ist
-    y = [(100 + base_soll) for i in range(96)]
-    constant = pd.Series(y, index=holiday.index)
-
-    constant_2 = constant_1.copy()
-    for i in range(len(constant_2)):
-        constant_2.iloc[i] = (
-            constant_1.iloc[i] / constant_1["Total"].iloc[i] * constant[i]
-        )
-    constant_2 = constant_2.round(2)
-    # modul_1_IND_E.diagram_1(constant_2)
-
+    industry_data = data_industry_type[
+        data_industry_type["industry_number"] == industry_number
+    ]
+    day_types_1 = (weekday_1, saturday_1, sunday_1, holiday_1, constant_1)
+
+    day_types_2 = rescale_day_types(
+        np.stack([day_type.to_numpy(dtype=float) for day_type in day_types_1]),
+        industry_data["Peak_faktor"].iloc[0],
+        industry_data["Base_faktor"].iloc[0],
+    )
+
+    weekday_2, saturday_2, sunday_2, holiday_2, constant_2 = (
+        pd.DataFrame(values, index=day_type.index, columns=day_type.columns)
+        for values, day_type in zip(day_types_2, day_types_1)
+    )
     return weekday_2, saturday_2, sunday_2, holiday_2, constant_2
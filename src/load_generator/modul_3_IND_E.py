@@ -6,101 +6,127 @@ Created on Mon Oct  4 15:59:18 2021
 """
 
 import datetime
-from pathlib import Path
+import functools
 
 import holidays
+import numpy as np
 import pandas as pd
-import streamlit as st
 
-
-@st.cache_data
-def modul_3(year):
-    """===LIST OF HOLIDAYS==="""
-
-    year_list = pd.date_range(str(year) + "-01-01", str(year) + "-12-31", freq="D")
-    year_list = list(year_list)
-
-    dates = []
-    names = []
-    for date, name in sorted(holidays.Germany(years=year).items()):
-        dates.append(date)
-        names.append(name)
+from src.load_generator import profile_store
+from src.load_generator.cache import cached
+
+
+# Position der Lasttypen 1-5 in der Typtag-Reihenfolge von modul_2
+# (weekday, saturday, sunday, holiday, constant)
+LOAD_TYPE_DAY_TYPES = [0, 3, 1, 2, 4]
+
+
+# Bundesland (holidays-Kürzel) je Länderschlüssel, d.h. den ersten beiden Stellen
+# der Regionalschlüssel (AGS)
+STATE_BY_AGS_PREFIX = {
+    "01": "SH",
+    "02": "HH",
+    "03": "NI",
+    "04": "HB",
+    "05": "NW",
+    "06": "HE",
+    "07": "RP",
+    "08": "BW",
+    "09": "BY",
+    "10": "SL",
+    "11": "BE",
+    "12": "BB",
+    "13": "MV",
+    "14": "SN",
+    "15": "ST",
+    "16": "TH",
+}
+
+
+def state_of_region(region_id):
+    """Bundesland eines Kreises anhand seines Regionalschlüssels."""
+    return STATE_BY_AGS_PREFIX[str(region_id).zfill(5)[:2]]
+
+
+@functools.cache
+def working_days(year, state=None):
+    """===LIST OF HOLIDAYS===
+
+    Clustering days into working days (True) and non working days (False).
+    Non working days are weekends, public holidays (national or of the given
+    Bundesland), Christmas Eve and New Year's Eve.
+    """
+    days = pd.date_range(str(year) + "-01-01", str(year) + "-12-31", freq="D")
+    dates = [*holidays.Germany(years=year, subdiv=state)]
     dates.append(datetime.date(year, 12, 24))
     dates.append(datetime.date(year, 12, 31))
-    names.append("Heiligabend")
-    names.append("Sylvester")
-    list_holidays = pd.DataFrame({"date": dates, "name": names}, index=None)
-
-    for i in list_holidays["date"]:
-        if datetime.date.weekday(i) == 1:
-            list_holidays.loc[len(list_holidays)] = [
-                (i + datetime.timedelta(days=-1)),
-                "Brückentag",
-            ]
-        elif datetime.date.weekday(i) == 3:
-            list_holidays.loc[len(list_holidays)] = [
-                (i + datetime.timedelta(days=1)),
-                "Brückentag",
-            ]
-
-    """Clustering days into working days (1) and non working days (2)"""
-    array_wd_we = []
-    count = 1
-    for i in year_list:
-        if (
-            datetime.datetime.weekday(i) in [0, 1, 2, 3, 4]
-            and i.to_pydatetime().date() not in dates
-        ):  # holidays
-            array_wd_we.append(1)
-        else:
-            array_wd_we.append(2)
 
+    working_day = (days.weekday < 5) & ~days.isin(pd.to_datetime(dates))
+    working_day.flags.writeable = False  # memoized, shared by all callers
+    return working_day
+
+
+def load_types(working_day):
     """Clustering days into load pattern days (1)-(5)
     (1) working day with weekday load profile
     (2) holiday between working days with holiday load profile
     (3) Saturday or holiday where: day before working day, day after non-working day with saturday load profile
     (4) Saturday or holiday where: day before non-working day, day after working day with sunday load profile
     (5) Weekend or holiday where: days before and after non-working day with constant load profile
-    
+
+    Days outside the range count as non working days.
     """
+    working_day = np.asarray(working_day, dtype=bool)
+    day_before = np.concatenate([[False], working_day[:-1]])
+    day_after = np.concatenate([working_day[1:], [False]])
+    return np.where(
+        working_day,
+        1,
+        2 + (~day_after).astype(int) + 2 * (~day_before).astype(int),
+    )
+
+
+def calendar(first_year, last_year=None, state=None):
+    """Days and load pattern days (1)-(5) for the years first_year to last_year."""
+    years = range(first_year, (last_year or first_year) + 1)
+    working_day = np.concatenate([working_days(year, state) for year in years])
+    days = pd.date_range(str(years[0]) + "-01-01", str(years[-1]) + "-12-31")
+    return days, load_types(working_day)
+
 
-    array_load_type = []
-    for i in range(len(array_wd_we)):
-        if array_wd_we[i] == 1:
-            array_load_type.append(1)
-            count += 1
-        elif array_wd_we[i] == 2 and i != 0 and i != len(array_wd_we) - 1:
-            if array_wd_we[i - 1] == 1:
-                if array_wd_we[i + 1] == 1:
-                    array_load_type.append(2)
-                elif array_wd_we[i + 1] == 2:
-                    array_load_type.append(3)
-            elif array_wd_we[i - 1] == 2:
-                if array_wd_we[i + 1] == 1:
-                    array_load_type.append(4)
-                elif array_wd_we[i + 1] == 2:
-                    array_load_type.append(5)
-        elif i == 0:
-            if array_wd_we[i + 1] == 1:
-                array_load_type.append(4)
-            elif array_wd_we[i + 1] == 2:
-                array_load_type.append(5)
-        elif i == len(array_wd_we) - 1:
-            if array_wd_we[i - 1] == 1:
-                array_load_type.append(3)
-            elif array_wd_we[i - 1] == 2:
-                array_load_type.append(5)
-        else:
-            print(50)
-
-    return year_list, array_load_type
+@cached
+def modul_3(year, state=None):
+    """Days of the year and their load pattern days (1)-(5)."""
+    days, array_load_type = calendar(year, state=state)
+    return list(days), array_load_type.tolist()
 
 
 """""" """""" """""" """""" """""" """""" """""" """""" """"""
 """Space heating is modeled by seasonality factors"""
 
 
-@st.cache_data
+def get_month_factors(path):
+    """Monatliche Heizgradtag-Faktoren (Januar bis Dezember) als Array."""
+    month_factor = profile_store.read_excel(
+        path, "HeatingDegreeDays.xlsx", sheet_name="HDD"
+    )
+    return month_factor.iloc[0][1:13].to_numpy(dtype=float)
+
+
+def assemble_year(day_types, array_load_type, day_factors, heating_column):
+    """Zusammensetzen der Typtage zu einem Jahreslastgang in einem Schritt.
+
+    day_types ist ein Array (... x Lasttyp x 96 x Anwendung) in der Reihenfolge
+    der Lasttypen 1-5 aus modul_3, day_factors enthält je Tag den Faktor für die
+    Spalte heating_column (Raumwärme). Rückgabe: (... x Zeitschritt x Anwendung).
+    """
+    day_types = np.asarray(day_types, dtype=float)
+    days = day_types[..., np.asarray(array_load_type) - 1, :, :]
+    days[..., heating_column] *= np.asarray(day_factors)[:, np.newaxis]
+    return days.reshape(*days.shape[:-3], -1, days.shape[-1])
+
+
+@cached
 def seasonality(
     year,
     year_list,
@@ -112,12 +138,9 @@ def seasonality(
     constant_2,
     path,
 ):  # With seasonality
-    month_factor = pd.read_excel(
-        Path(path) / "HeatingDegreeDays.xlsx", sheet_name="HDD"
-    )
-    month_factor = month_factor.iloc[0][1:13]
+    month_factor = get_month_factors(path)
 
-    df = pd.DataFrame(dtype=float)
+    # Reihenfolge entspricht den Lasttypen 1-5 aus modul_3
     dict_load_type = {
         1: weekday_2,
         2: holiday_2,
@@ -125,27 +148,30 @@ def seasonality(
         4: sunday_2,
         5: constant_2,
     }
+    day_types = np.stack(
+        [day_type.to_numpy(dtype=float) for day_type in dict_load_type.values()]
+    )
+    months = pd.DatetimeIndex(year_list).month.to_numpy()
 
-    for i in range(len(year_list)):
-        dayprofile_3 = dict_load_type[array_load_type[i]].copy()
-        dayprofile_3["Raumwärme"] = (
-            dayprofile_3["Raumwärme"] * month_factor.iloc[year_list[i].month - 1]
-        )
-        df = pd.concat([df, dayprofile_3], ignore_index=True)
+    values = assemble_year(
+        day_types,
+        array_load_type,
+        month_factor[months - 1],
+        weekday_2.columns.get_loc("Raumwärme"),
+    )
 
     idx = pd.date_range(
         datetime.datetime(year, 1, 1, 0, 0),
         datetime.datetime(year, 12, 31, 23, 45),
         freq="15min",
     )
-    df.index = idx
-    return df
+    return pd.DataFrame(values, index=idx, columns=weekday_2.columns)
 
 
 """""" """""" """""" """""" """""" """""" """""" """""" """"""
 
 
-@st.cache_data
+@cached
 def normalising_1000(df):
     """Normalising the yearly load to 1000 MWh"""
     energy_per_year_3 = float(df["Total"].sum() * 0.25 / 1000)  # Energie_ist in MWh/a
@@ -6,10 +6,11 @@ Created on Mon Oct  4 15:59:18 2021
 """
 
 import numpy as np
-import streamlit as st
 
+from src.load_generator.cache import cached
 
-@st.cache_data
+
+@cached
 def modul_4(year, industry_number, df_year_3, data_industry_type):
     """Upscaling the yearly load to energy demand of 2019"""
     energy_per_year_MWh = data_industry_type["Energieverbrauch " + str(year)].iloc[0]
@@ -21,19 +22,62 @@ def modul_4(year, industry_number, df_year_3, data_industry_type):
     return df_year_4
 
 
-@st.cache_data
-def modul_4_fluct(industry_number, df_year_4, data_industry_type):
+# Länge der float32-Blöcke, in denen das Rauschen erzeugt wird
+FLUCT_CHUNK_SIZE = 8192
+
+
+def fluctuation_rng(seed, industry_number):
+    """Random generator for the fluctuation of an industry type.
+
+    ``seed`` is an int or a tuple of ints (e.g. ``(seed, year)``); each industry
+    type gets its own stream. Without seed the generator is seeded randomly.
+    """
+    if seed is None:
+        return np.random.default_rng()
+    return np.random.default_rng([*np.atleast_1d(seed), industry_number])
+
+
+def fluctuation_std(s_norm, power_peak):
+    """Absolute standard deviation (kW) of the fluctuation.
+
+    s_norm is the relative fluctuation in % at a peak load of 100 kW.
+    """
+    s_rel = (
+        s_norm * (100 / power_peak) ** 0.5
+    )  # relative Fluktuation in % bezogen auf tatsächliche Leistung
+    return s_rel / 100 * power_peak
+
+
+def fluctuation_noise(rng, s_abs, n, chunk_size=FLUCT_CHUNK_SIZE):
+    """Normal noise with standard deviation s_abs, rounded to whole kW (float32)."""
+    noise = np.empty(n, dtype=np.float32)
+    scale = np.float32(s_abs)
+    for start in range(0, n, chunk_size):
+        chunk = noise[start : start + chunk_size]
+        rng.standard_normal(dtype=np.float32, out=chunk)
+        chunk *= scale
+        np.round(chunk, out=chunk)
+    return noise
+
+
+@cached
+def modul_4_fluct(industry_number, df_year_4, data_industry_type, seed=None):
+    """Add the random fluctuation to a copy of df_year_4.
+
+    The noise is reproducible for a given ``seed`` (see fluctuation_rng).
+    """
     s_norm = data_industry_type["Fluktuation"][
         industry_number
     ]  # relative Fluktuation in % relativ zu 100 kW Leistung
     power_peak = np.max(df_year_4["Total"])  # in kW
-    s_rel = (
-        s_norm * (100 / power_peak) ** 0.5
-    )  # relative Fluktuation in % bezogen auf tatsächliche Leistung
-    s_abs = s_rel / 100 * power_peak
+    s_abs = fluctuation_std(s_norm, power_peak)
 
-    rand_numbers = np.random.normal(0, s_abs, len(df_year_4)).round(0)
+    rand_numbers = fluctuation_noise(
+        fluctuation_rng(seed, industry_number), s_abs, len(df_year_4)
+    )
 
+    # df_year_4 ist das (gecachte) Ergebnis von modul_4 und bleibt unverändert
+    df_year_4 = df_year_4.copy()
     df_year_4["Mechanische Antriebe"] = df_year_4["Mechanische Antriebe"] + rand_numbers
     df_year_4["Total"] = df_year_4["Total"] + rand_numbers
 
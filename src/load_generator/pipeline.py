@@ -0,0 +1,278 @@
+# -*- coding: utf-8 -*-
+"""IND-E pipeline (modul_1 to modul_4) for a single industry type.
+
+Plain Python API without Streamlit, e.g. for scripts and batch workers::
+
+    from src.load_generator import cache, pipeline
+
+    cache.configure("memory", maxsize=256)
+    df_year_4 = pipeline.generate_profile(3, 2019, "data/profiles")
+"""
+
+from src.load_generator import (
+    cache,
+    modul_1_IND_E,
+    modul_2_IND_E,
+    modul_3_IND_E,
+    modul_4_IND_E,
+)
+from src.load_generator.cache import cached
+
+# Die Stufen sind nur über ihre skalaren Parameter gecacht. Die modul-Funktionen
+# werden daher direkt (ohne ihren eigenen Cache) aufgerufen, so dass keine
+# DataFrames gehasht werden müssen.
+_modul_2 = modul_2_IND_E.modul_2.__wrapped__
+_seasonality = modul_3_IND_E.seasonality.__wrapped__
+_normalising_1000 = modul_3_IND_E.normalising_1000.__wrapped__
+_modul_4 = modul_4_IND_E.modul_4.__wrapped__
+_modul_4_fluct = modul_4_IND_E.modul_4_fluct.__wrapped__
+
+
+def industry_type_data(
+    industry_number,
+    year,
+    data_path,
+    fluctuation=None,
+    energy=None,
+    peak_faktor=None,
+    base_faktor=None,
+):
+    """Row of the industry type table with the given values overridden."""
+    data_industry_type = modul_1_IND_E.get_industry_type_data(data_path)
+    data_industry_type = data_industry_type[
+        data_industry_type.industry_number.eq(industry_number)
+    ].copy()
+    overrides = {
+        "Fluktuation": fluctuation,
+        "Energieverbrauch " + str(year): energy,
+        "Peak_faktor": peak_faktor,
+        "Base_faktor": base_faktor,
+    }
+    for column, value in overrides.items():
+        if value is not None:
+            data_industry_type[column] = value
+    return data_industry_type
+
+
+def _day_types(industry_number, year, data_path, peak_faktor, base_faktor):
+    # """Ausführen von Modul 1:
+    # Normierte Lastprofile pro Typtag"""
+    *day_types_1, _ = modul_1_IND_E.modul_1_el(industry_number, data_path)
+
+    # """Ausführen von Modul 2:
+    # Anpassung in vertikaler Richtung, Strecken und Stauchen
+    # anhand base_ und peak_faktoren"""
+    data_industry_type = industry_type_data(
+        industry_number,
+        year,
+        data_path,
+        peak_faktor=peak_faktor,
+        base_faktor=base_faktor,
+    )
+    return _modul_2(year, industry_number, data_industry_type, *day_types_1)
+
+
+def _normalised_profile(day_types_2, year, data_path):
+    # """Ausführen von Modul 3:
+    # Zusammensetzen der Tageslastgänge zu Lastgang 1 Jahr, Normierung
+    # auf Verbrauch von 1000 MWh/a"""
+    year_list, array_load_type = modul_3_IND_E.modul_3(year)
+    df = _seasonality(year, year_list, array_load_type, *day_types_2, data_path)
+    return _normalising_1000(df)
+
+
+def _scaled_profile(df_year_3, industry_number, year, data_path, energy):
+    # """Ausführen von Modul 4:
+    # Skalieren auf Jahresverbrauch"""
+    data_industry_type = industry_type_data(
+        industry_number, year, data_path, energy=energy
+    )
+    return _modul_4(year, industry_number, df_year_3, data_industry_type)
+
+
+def _fluctuated_profile(
+    df_year_4, industry_number, year, data_path, fluctuation, with_fluctuation, seed
+):
+    # """Aufprägung der Fluktuationen"""
+    if not with_fluctuation:
+        return df_year_4
+    data_industry_type = industry_type_data(
+        industry_number, year, data_path, fluctuation=fluctuation
+    )
+    return _modul_4_fluct(industry_number, df_year_4, data_industry_type, seed)
+
+
+# Stufen der Pipeline in Ausführungsreihenfolge:
+# Name -> (Funktion, vorherige Stufe, Parameter der Stufe)
+# Eine Stufe hängt von ihren Parametern und von allen vorherigen Stufen ab.
+STAGES = {
+    "day_types": (
+        _day_types,
+        None,
+        ("industry_number", "year", "data_path", "peak_faktor", "base_faktor"),
+    ),
+    "normalised_profile": (
+        _normalised_profile,
+        "day_types",
+        ("year", "data_path"),
+    ),
+    "scaled_profile": (
+        _scaled_profile,
+        "normalised_profile",
+        ("industry_number", "year", "data_path", "energy"),
+    ),
+    "fluctuated_profile": (
+        _fluctuated_profile,
+        "scaled_profile",
+        (
+            "industry_number",
+            "year",
+            "data_path",
+            "fluctuation",
+            "with_fluctuation",
+            "seed",
+        ),
+    ),
+}
+
+
+def stage_parameters(stage):
+    """All parameters a stage depends on, directly or through earlier stages."""
+    parameters = set()
+    while stage is not None:
+        _, stage, names = STAGES[stage]
+        parameters.update(names)
+    return parameters
+
+
+class IncrementalPipeline:
+    """Stage DAG that keeps the last result of every stage.
+
+    run() only recomputes the stages whose parameters changed since the last
+    run, and all stages after them; their names are listed in ``recomputed``.
+    E.g. a new energy only rescales and redraws the noise, a new fluctuation
+    only redraws the noise. Keep one instance per user session.
+
+    If a cache backend is configured, stages to recompute are looked up in the
+    shared cache first (via day_types, normalised_profile, scaled_profile and
+    generate_profile), so sessions and the warm-up share their results.
+    """
+
+    def __init__(self):
+        self._results = {}
+        self.recomputed = []
+
+    def run(
+        self,
+        industry_number,
+        year,
+        data_path,
+        fluctuation=None,
+        energy=None,
+        peak_faktor=None,
+        base_faktor=None,
+        with_fluctuation=True,
+        seed=None,
+    ):
+        """Same result as generate_profile."""
+        parameters = {
+            "industry_number": industry_number,
+            "year": year,
+            "data_path": data_path,
+            "fluctuation": fluctuation,
+            "energy": energy,
+            "peak_faktor": peak_faktor,
+            "base_faktor": base_faktor,
+            "with_fluctuation": with_fluctuation,
+            "seed": seed,
+        }
+        shared = not isinstance(cache.get_backend(), cache.NullCache)
+        self.recomputed = []
+        result = None
+        for stage, (func, upstream, names) in STAGES.items():
+            key = tuple(parameters[name] for name in names)
+            last_key, last_result = self._results.get(stage, (None, None))
+            if self.recomputed or key != last_key:
+                if shared:
+                    result = CACHED_STAGES[stage](
+                        **{name: parameters[name] for name in stage_parameters(stage)}
+                    )
+                else:
+                    args = [result] if upstream is not None else []
+                    result = func(*args, *key)
+                self._results[stage] = (key, result)
+                self.recomputed.append(stage)
+            else:
+                result = last_result
+        return result
+
+
+@cached
+def day_types(industry_number, year, data_path, peak_faktor=None, base_faktor=None):
+    """Day types after modul_2 (weekday, saturday, sunday, holiday, constant)."""
+    return _day_types(industry_number, year, data_path, peak_faktor, base_faktor)
+
+
+@cached
+def normalised_profile(
+    industry_number, year, data_path, peak_faktor=None, base_faktor=None
+):
+    """Yearly profile after modul_3, normalised to 1000 MWh/a."""
+    day_types_2 = day_types(industry_number, year, data_path, peak_faktor, base_faktor)
+    return _normalised_profile(day_types_2, year, data_path)
+
+
+@cached
+def scaled_profile(
+    industry_number, year, data_path, energy=None, peak_faktor=None, base_faktor=None
+):
+    """Yearly profile after modul_4, scaled to the energy consumption."""
+    df_year_3 = normalised_profile(
+        industry_number, year, data_path, peak_faktor, base_faktor
+    )
+    return _scaled_profile(df_year_3, industry_number, year, data_path, energy)
+
+
+@cached
+def generate_profile(
+    industry_number,
+    year,
+    data_path,
+    fluctuation=None,
+    energy=None,
+    peak_faktor=None,
+    base_faktor=None,
+    with_fluctuation=True,
+    seed=None,
+):
+    """Yearly load profile (15 min, kW) of an industry type by end use.
+
+    fluctuation, energy (1000 MWh/a), peak_faktor and base_faktor override the
+    values of the industry type table. With ``with_fluctuation=False`` the
+    profile is returned without the random fluctuation of modul_4_fluct, which
+    is reproducible for a given ``seed``.
+
+    The profile and its intermediate stages are cached by these scalar
+    parameters only, so a cache hit does not hash any DataFrame.
+    """
+    df_year_4 = scaled_profile(
+        industry_number, year, data_path, energy, peak_faktor, base_faktor
+    )
+    return _fluctuated_profile(
+        df_year_4,
+        industry_number,
+        year,
+        data_path,
+        fluctuation,
+        with_fluctuation,
+        seed,
+    )
+
+
+# gecachte Funktion je Stufe, mit allen Parametern der Stufe (stage_parameters)
+CACHED_STAGES = {
+    "day_types": day_types,
+    "normalised_profile": normalised_profile,
+    "scaled_profile": scaled_profile,
+    "fluctuated_profile": generate_profile,
+}
@@ -0,0 +1,195 @@
+# -*- coding: utf-8 -*-
+"""Compiled binary store for the Excel inputs of the load generator.
+
+Parsing the workbooks with openpyxl is the slowest part of a cold start. Every
+``read_excel`` call of the generator is therefore compiled once into a binary
+file in ``<data_path>/_compiled`` and read from there until the source workbook
+changes. A store entry is rebuilt when the mtime or size of its workbook differs
+from the manifest and the content hash does not match either.
+
+Compile all inputs ahead of time with::
+
+    python -m src.load_generator.profile_store data/profiles
+"""
+
+import argparse
+import hashlib
+import json
+from pathlib import Path
+
+import pandas as pd
+
+from src.load_generator import cache
+from src.load_generator.fileio import atomic_write
+
+STORE_DIR_NAME = "_compiled"
+
+DAY_TYPE_SHEETS = ("Week_day", "Saturday", "Sunday", "Holiday")
+
+# Alle Excel-Eingaben des Lastgenerators:
+# (Pfad relativ zu data_path, read_excel-Argumente, Tabellenblätter oder None)
+SOURCES = [
+    ("Electrical/Load_profiles_enduser.xlsx", {"usecols": "B:J"}, DAY_TYPE_SHEETS),
+    ("Thermal/Load_profiles_daytypes.xlsx", {"index_col": 0}, DAY_TYPE_SHEETS),
+    ("Electrical/All_info_industry_types_electrical.xlsx", {"skipfooter": 1}, None),
+    ("Thermal/All_info_industry_types_thermal.xlsx", {}, None),
+    ("HeatingDegreeDays.xlsx", {"sheet_name": "HDD"}, None),
+]
+
+
+def _entry_path(data_path, source, kwargs):
+    key = json.dumps([source, kwargs], sort_keys=True)
+    digest = hashlib.sha256(key.encode()).hexdigest()[:12]
+    return Path(data_path) / STORE_DIR_NAME / f"{Path(source).stem}-{digest}.pkl"
+
+
+def _file_digest(path):
+    return hashlib.sha256(Path(path).read_bytes()).hexdigest()
+
+
+def _source_state(source_file):
+    stat = source_file.stat()
+    return {"mtime_ns": stat.st_mtime_ns, "size": stat.st_size}
+
+
+def _write_manifest(entry, manifest):
+    atomic_write(
+        entry.with_suffix(".json"), lambda f: f.write(json.dumps(manifest).encode())
+    )
+
+
+def is_fresh(entry, source_file):
+    """Check whether a store entry is up to date with its source workbook."""
+    try:
+        manifest = json.loads(entry.with_suffix(".json").read_text())
+    except (OSError, ValueError):
+        return False
+    if not entry.exists():
+        return False
+
+    state = _source_state(source_file)
+    if all(manifest.get(k) == v for k, v in state.items()):
+        return True
+    if manifest.get("sha256") != _file_digest(source_file):
+        return False
+    # Inhalt unverändert, nur mtime neu (z.B. nach einem frischen Checkout)
+    try:
+        _write_manifest(entry, {**manifest, **state})
+    except OSError:
+        pass
+    return True
+
+
+def _write_entry(data_path, source, kwargs, df):
+    source_file = Path(data_path) / source
+    entry = _entry_path(data_path, source, kwargs)
+    try:
+        entry.parent.mkdir(exist_ok=True)
+        atomic_write(entry, lambda f: pd.to_pickle(df, f))
+        _write_manifest(
+            entry,
+            {
+                "source": source,
+                "kwargs": kwargs,
+                "sha256": _file_digest(source_file),
+                **_source_state(source_file),
+            },
+        )
+    except OSError:
+        pass  # z.B. schreibgeschütztes Deployment: direkt die Excel-Daten verwenden
+
+
+def _read_entry(data_path, source, kwargs):
+    """Return the stored frame, or None if the entry is missing or stale."""
+    entry = _entry_path(data_path, source, kwargs)
+    if is_fresh(entry, Path(data_path) / source):
+        try:
+            return pd.read_pickle(entry)
+        except Exception:
+            pass  # defekter Eintrag wird neu erstellt
+    return None
+
+
+def compile_entry(data_path, source, **kwargs):
+    """Parse a workbook sheet and write it to the store."""
+    df = pd.read_excel(Path(data_path) / source, **kwargs)
+    _write_entry(data_path, source, kwargs, df)
+    return df
+
+
+def compile_workbook(data_path, source, sheet_names, **kwargs):
+    """Parse several sheets of a workbook in one pass and write them to the store."""
+    sheets = pd.read_excel(
+        Path(data_path) / source, sheet_name=list(sheet_names), **kwargs
+    )
+    for sheet_name, df in sheets.items():
+        _write_entry(data_path, source, {**kwargs, "sheet_name": sheet_name}, df)
+    return sheets
+
+
+def read_excel(data_path, source, **kwargs):
+    """Drop-in for ``pd.read_excel(Path(data_path) / source, **kwargs)`` backed by the store."""
+    df = _read_entry(data_path, source, kwargs)
+    if df is None:
+        df = compile_entry(data_path, source, **kwargs)
+    return df
+
+
+def read_workbook(data_path, source, sheet_names, **kwargs):
+    """Read several sheets of a workbook, opening the workbook at most once."""
+    sheets = {
+        sheet_name: _read_entry(data_path, source, {**kwargs, "sheet_name": sheet_name})
+        for sheet_name in sheet_names
+    }
+    stale = [sheet_name for sheet_name, df in sheets.items() if df is None]
+    if stale:
+        sheets.update(compile_workbook(data_path, source, stale, **kwargs))
+    return sheets
+
+
+# sha256 je (Datei, mtime_ns, Größe), damit unveränderte Dateien nur einmal
+# gelesen werden
+_digests = {}
+
+
+def content_version(files):
+    """Hash of the content of the files ``{label: path}``, missing files skipped."""
+    h = hashlib.sha256()
+    for label, path in files.items():
+        path = Path(path)
+        try:
+            state = _source_state(path)
+        except FileNotFoundError:
+            continue
+        key = (str(path.resolve()), state["mtime_ns"], state["size"])
+        if key not in _digests:
+            _digests[key] = _file_digest(path)
+        h.update(f"{label}:{_digests[key]}".encode())
+    return h.hexdigest()
+
+
+def data_version(data_path):
+    """Hash of the content of all input workbooks in data_path."""
+    return content_version(
+        {source: Path(data_path) / source for source, _, _ in SOURCES}
+    )
+
+
+# Cache-Schlüssel hängen vom Inhalt der Eingabedaten ab (seasonality: "path")
+cache.register_version("data_path", data_version)
+cache.register_version("path", data_version)
+
+
+def compile_profile_store(data_path):
+    """Compile all Excel inputs of the load generator."""
+    for source, kwargs, sheet_names in SOURCES:
+        if sheet_names is None:
+            compile_entry(data_path, source, **kwargs)
+        else:
+            compile_workbook(data_path, source, sheet_names, **kwargs)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=compile_profile_store.__doc__)
+    parser.add_argument("data_path", nargs="?", default="data/profiles")
+    compile_profile_store(parser.parse_args().data_path)
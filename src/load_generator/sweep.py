@@ -0,0 +1,99 @@
+# -*- coding: utf-8 -*-
+"""Sensitivity of the IND-E profile to the peak and base factors.
+
+The peak and base factors only stretch the day types (modul_2); the yearly
+profile repeats them according to the calendar (modul_3) and is scaled to the
+energy consumption (modul_4). The total load of a year is therefore given by
+the five stretched day types and the number of days of each load type, and the
+day types of all grid points are stretched in one broadcast call of
+modul_2_IND_E.rescale_day_types::
+
+    metrics = factor_sweep(
+        3, 2019, "data/profiles", np.linspace(1.1, 2, 50), np.linspace(0.2, 0.9, 50)
+    )
+
+The full profile of a grid point is only built on demand, with
+pipeline.generate_profile(..., peak_faktor=p, base_faktor=b, with_fluctuation=False)
+or factorized.factorize_profile.
+"""
+
+import numpy as np
+import pandas as pd
+
+from src.load_generator import modul_1_IND_E, modul_2_IND_E, modul_3_IND_E, pipeline
+from src.load_generator.cache import cached
+
+# Gitterpunkte, die gemeinsam gestreckt werden
+BLOCK_SIZE = 4096
+
+
+@cached
+def factor_sweep(
+    industry_number,
+    year,
+    data_path,
+    peak_faktors,
+    base_faktors,
+    energy=None,
+    state=None,
+    block_size=BLOCK_SIZE,
+):
+    """Summary metrics of the profile for every pair of peak and base factor.
+
+    Returns a frame indexed by (peak_faktor, base_faktor) with the annual peak
+    and base load (kW) of the total load, the energy (MWh) and the full-load
+    hours (h). The values equal those of pipeline.generate_profile without
+    fluctuation, up to rounding of the sum in normalising_1000.
+    """
+    grid = pd.MultiIndex.from_product(
+        [np.asarray(peak_faktors, dtype=float), np.asarray(base_faktors, dtype=float)],
+        names=["peak_faktor", "base_faktor"],
+    )
+    *day_types_1, _ = modul_1_IND_E.modul_1_el(industry_number, data_path)
+    # modul_2 skaliert die Anwendungen mit der Gesamtlast, die Gesamtlast genügt
+    totals_1 = np.stack(
+        [day_type[["Total"]].to_numpy(dtype=float) for day_type in day_types_1]
+    )
+
+    # modul_3: Anzahl der Tage je Typtag, die Saisonalität ändert "Total" nicht
+    _, array_load_type = modul_3_IND_E.calendar(year, state=state)
+    day_counts = np.bincount(
+        np.asarray(modul_3_IND_E.LOAD_TYPE_DAY_TYPES)[array_load_type - 1],
+        minlength=len(day_types_1),
+    )
+    used = day_counts > 0
+
+    if energy is None:
+        data_industry_type = pipeline.industry_type_data(
+            industry_number, year, data_path
+        )
+        energy = data_industry_type["Energieverbrauch " + str(year)].iloc[0]
+
+    metrics = []
+    for start in range(0, len(grid), block_size):
+        block = grid[start : start + block_size]
+        totals_2 = modul_2_IND_E.rescale_day_types(
+            totals_1,
+            block.get_level_values("peak_faktor").to_numpy(),
+            block.get_level_values("base_faktor").to_numpy(),
+        )[..., 0]
+
+        # normalising_1000 und modul_4 auf den Typtagen (Gitterpunkt x Typtag x 96)
+        energy_per_year_3 = day_counts @ totals_2.sum(axis=-1).T * 0.25 / 1000
+        days_4 = totals_2 / (energy_per_year_3 / 1000)[:, np.newaxis, np.newaxis]
+        days_4 = (days_4 * energy).round(0)
+
+        energy_MWh = day_counts @ days_4.sum(axis=-1).T * 0.25 / 1000
+        peak = days_4[:, used].max(axis=(1, 2))
+        metrics.append(
+            pd.DataFrame(
+                {
+                    "Peak": peak,
+                    "Base": days_4[:, used].min(axis=(1, 2)),
+                    "Energy": energy_MWh,
+                    "Full-load hours": energy_MWh * 1000 / peak,
+                },
+                index=block,
+            )
+        )
+    return pd.concat(metrics)
@@ -0,0 +1,87 @@
+"""Pre-parsed and pre-simplified store of the region geometries.
+
+The WKT polygons of ``data/data_regions_KRS_2022-01-01.csv`` are parsed once and
+simplified for every level (tolerance in metres, EPSG:3035). Each level is stored
+as GeoJSON string in EPSG:4326 with only ``id`` and ``name`` as properties, ready
+to be handed to folium without any conversion. The store is rebuilt when the CSV
+file is newer than the store.
+"""
+
+import math
+from pathlib import Path
+
+import pandas as pd
+
+from src.get_industry_data import DATA_DIR
+from src.load_generator.fileio import atomic_write
+
+SOURCE = DATA_DIR / "data_regions_KRS_2022-01-01.csv"
+STORE_DIR = DATA_DIR / "_compiled"
+
+# simplification tolerances in metres, 0 keeps the source geometry (500 m)
+TOLERANCES = [0, 1000, 2500, 5000]
+
+# metres per pixel of a web map at zoom level 0 and the latitude of Germany
+METRES_PER_PIXEL_ZOOM_0 = 156543.03 * math.cos(math.radians(51))
+
+
+def _store_paths() -> dict[int, Path]:
+    return {
+        tolerance: STORE_DIR / f"{SOURCE.stem}.{tolerance}m.geojson"
+        for tolerance in TOLERANCES
+    }
+
+
+def _geometry_column(tolerance: int) -> str:
+    return "geometry" if tolerance == 0 else f"geometry_{tolerance}m"
+
+
+def is_fresh() -> bool:
+    """Check whether the store exists and is newer than the CSV file."""
+    paths = _store_paths().values()
+    if not all(path.exists() for path in paths):
+        return False
+    compiled = min(path.stat().st_mtime for path in paths)
+    return SOURCE.stat().st_mtime <= compiled
+
+
+def compile_region_geometry():
+    """Parse the CSV file and write all simplification levels to the store."""
+    import geopandas as gpd
+
+    df = pd.read_csv(SOURCE, dtype={"id": str}, index_col=0)
+    gdf = gpd.GeoDataFrame(
+        df.drop(columns="geometry_epsg3035_500m"),
+        geometry=gpd.GeoSeries.from_wkt(df["geometry_epsg3035_500m"]),
+        crs="EPSG:3035",
+    )
+    for tolerance in TOLERANCES[1:]:
+        gdf[_geometry_column(tolerance)] = gdf.geometry.simplify(
+            tolerance, preserve_topology=True
+        )
+
+    STORE_DIR.mkdir(parents=True, exist_ok=True)
+    paths = _store_paths()
+    for tolerance in TOLERANCES:
+        geojson = (
+            gdf[["id", "name"]]
+            .set_geometry(gdf[_geometry_column(tolerance)])
+            .to_crs("EPSG:4326")
+        )
+        # ~1 m precision is plenty for a map and keeps the strings small
+        geojson.geometry = geojson.geometry.set_precision(1e-5)
+        text = geojson.to_json(drop_id=True)
+        atomic_write(paths[tolerance], lambda f: f.write(text.encode()))
+
+
+def load_region_geojson(tolerance: int = 0) -> str:
+    """Pre-serialized GeoJSON (EPSG:4326) of the regions with ``id`` and ``name``."""
+    if not is_fresh():
+        compile_region_geometry()
+    return _store_paths()[tolerance].read_text()
+
+
+def tolerance_for_zoom(zoom: float) -> int:
+    """Coarsest tolerance that stays below one pixel at the given zoom level."""
+    metres_per_pixel = METRES_PER_PIXEL_ZOOM_0 / 2**zoom
+    return max(t for t in TOLERANCES if t <= metres_per_pixel)
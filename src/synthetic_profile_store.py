@@ -0,0 +1,156 @@
+"""Wide binary store of the precomputed synthetic load profiles.
+
+The CSV files ``data/profiles/load_profiles_<year>_<ind>.csv`` are compiled once
+into a (time x industry type) float32 array with a sorted int64 time index
+(nanoseconds since epoch). Both are stored as ``.npy`` files and memory-mapped on
+open, so date-range queries are a ``searchsorted`` plus a zero-copy view. The
+store is rebuilt when one of the CSV files is newer than the store.
+
+Without the CSV files the profiles are generated with the load generator
+(batch.generate_industry_profiles without fluctuation, end uses aggregated) from
+the workbooks in ``data/profiles``, and the store is rebuilt when one of the
+workbooks is newer than the store. Generated profiles exist per Bundesland, with
+the holidays of that state; the CSV files hold one national profile per industry
+type and are used for all states.
+"""
+
+import json
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from src.get_industry_data import (
+    DATA_DIR,
+    INDUSTRY_TYPE_IDS,
+    load_synthetic_load_profiles,
+)
+from src.load_generator import batch, profile_store
+from src.load_generator.fileio import atomic_write
+
+STORE_DIR = DATA_DIR / "profiles" / "_compiled"
+
+
+def _store_paths(year: int, state: str | None = None) -> dict[str, Path]:
+    name = f"load_profiles_{year}" if state is None else f"load_profiles_{year}_{state}"
+    return {
+        part: STORE_DIR / f"{name}.{part}.{suffix}"
+        for part, suffix in [("time", "npy"), ("values", "npy"), ("columns", "json")]
+    }
+
+
+def _source_paths(year: int) -> list[Path]:
+    return [
+        DATA_DIR / "profiles" / f"load_profiles_{year}_{ind}.csv"
+        for ind in INDUSTRY_TYPE_IDS
+    ]
+
+
+def _has_csv_sources(year: int) -> bool:
+    return all(source.exists() for source in _source_paths(year))
+
+
+def _generator_source_paths() -> list[Path]:
+    return [DATA_DIR / "profiles" / source for source, _, _ in profile_store.SOURCES]
+
+
+def is_fresh(year: int, state: str | None = None) -> bool:
+    """Check whether the store exists and is newer than all of its sources."""
+    paths = _store_paths(year, state).values()
+    if not all(path.exists() for path in paths):
+        return False
+    compiled = min(path.stat().st_mtime for path in paths)
+    if _has_csv_sources(year):
+        sources = _source_paths(year)
+    else:
+        sources = [path for path in _generator_source_paths() if path.exists()]
+    return all(source.stat().st_mtime <= compiled for source in sources)
+
+
+def generate_synthetic_load_profiles(
+    year: int = 2019, state: str | None = None
+) -> pd.DataFrame:
+    """(time x industry type) profiles of the load generator, end uses aggregated.
+
+    Same layout as load_synthetic_load_profiles, used when the CSV files are
+    not present. ``state`` selects the holidays of a Bundesland.
+    """
+    profiles, idx, columns = batch.generate_industry_profiles(
+        INDUSTRY_TYPE_IDS, year, str(DATA_DIR / "profiles"), state=state
+    )
+    end_uses = [i for i, column in enumerate(columns) if column != "Total"]
+    return pd.DataFrame(
+        profiles[..., end_uses].sum(axis=-1).T,
+        index=idx.rename("time"),
+        columns=pd.Index(INDUSTRY_TYPE_IDS, name="industry_id"),
+    )
+
+
+def compile_profile_matrix(year: int = 2019, state: str | None = None):
+    """Compile the profiles of a year (and Bundesland) into the binary store."""
+    if _has_csv_sources(year):
+        load_profiles = load_synthetic_load_profiles(year)
+    else:
+        load_profiles = generate_synthetic_load_profiles(year, state)
+    load_profiles = load_profiles.sort_index()
+    contents = {
+        "time": load_profiles.index.to_numpy("datetime64[ns]").view(np.int64),
+        "values": load_profiles.to_numpy(np.float32),
+    }
+
+    STORE_DIR.mkdir(parents=True, exist_ok=True)
+    for part, path in _store_paths(year, state).items():
+        if part == "columns":
+            text = json.dumps(load_profiles.columns.tolist())
+            atomic_write(path, lambda f: f.write(text.encode()))
+        else:
+            atomic_write(path, lambda f: np.save(f, contents[part]))
+
+
+def open_profile_matrix(
+    year: int = 2019, state: str | None = None
+) -> tuple[np.ndarray, np.ndarray, list]:
+    """Open the store memory-mapped, compiling it first if necessary.
+
+    ``state`` selects the profiles with the holidays of a Bundesland (ignored if
+    the national CSV files are present). Returns the int64 time index, the
+    (time x industry type) float32 values and the industry type ids of the
+    columns.
+    """
+    if _has_csv_sources(year):
+        state = None
+    if not is_fresh(year, state):
+        compile_profile_matrix(year, state)
+    paths = _store_paths(year, state)
+    return (
+        np.load(paths["time"], mmap_mode="r"),
+        np.load(paths["values"], mmap_mode="r"),
+        json.loads(paths["columns"].read_text()),
+    )
+
+
+def slice_profile_matrix(
+    time: np.ndarray, values: np.ndarray, start, end
+) -> tuple[np.ndarray, np.ndarray]:
+    """Views of time index and values between start and end (both inclusive)."""
+    first, last = (
+        np.datetime64(pd.Timestamp(t), "ns").view(np.int64) for t in (start, end)
+    )
+    i = np.searchsorted(time, first, side="left")
+    j = np.searchsorted(time, last, side="right")
+    return time[i:j], values[i:j]
+
+
+def to_frame(time: np.ndarray, values: np.ndarray, columns: list) -> pd.DataFrame:
+    """Wrap (a slice of) the store in a (time x industry type) frame."""
+    return pd.DataFrame(
+        values,
+        index=pd.DatetimeIndex(time.view("datetime64[ns]"), name="time"),
+        columns=pd.Index(columns, name="industry_id"),
+        copy=False,
+    )
+
+
+def load_profile_frame(year: int = 2019, state: str | None = None) -> pd.DataFrame:
+    """All profiles of a year as memory-mapped (time x industry type) frame."""
+    return to_frame(*open_profile_matrix(year, state))
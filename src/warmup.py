@@ -0,0 +1,110 @@
+"""Background warm-up of the caches at server start.
+
+The Excel inputs are parsed once and the profile stores of the regional page
+are built on disk. With a cache backend configured (see
+src.load_generator.cache), the profile with the default parameters of the
+synthetic profiles page is generated for every industry type and the scaling
+tables of the regional page are computed; without one (IND_E_CACHE=none) these
+results would be discarded, so the tasks are skipped. The geometry of the map
+is compiled when the map is first shown. All tasks run in a bounded thread
+pool, so the first page render is not blocked.
+"""
+
+import logging
+import os
+from concurrent.futures import Future, ThreadPoolExecutor
+
+from src.get_industry_data import INDUSTRY_TYPE_IDS, get_regional_scaling_matrix
+from src.load_generator import cache, modul_1_IND_E, modul_3_IND_E, pipeline
+from src.load_generator.modul_3_IND_E import STATE_BY_AGS_PREFIX
+from src.synthetic_profile_store import open_profile_matrix
+
+logger = logging.getLogger(__name__)
+
+
+class WarmUp:
+    """Named futures of the warm-up tasks."""
+
+    def __init__(self, futures: dict[str, Future]):
+        self.futures = futures
+
+    @property
+    def total(self) -> int:
+        return len(self.futures)
+
+    @property
+    def finished(self) -> int:
+        return sum(future.done() for future in self.futures.values())
+
+    def done(self) -> bool:
+        return self.finished == self.total
+
+    def failed(self) -> dict[str, BaseException]:
+        return {
+            name: future.exception()
+            for name, future in self.futures.items()
+            if future.done() and future.exception() is not None
+        }
+
+
+def _load_inputs(data_path: str):
+    # Excel-Eingaben einmal einlesen, bevor die Industrietypen parallel laufen
+    modul_1_IND_E.get_day_type_templates_el(data_path)
+    modul_3_IND_E.get_month_factors(data_path)
+    return modul_1_IND_E.get_industry_type_data(data_path)
+
+
+def _default_profile(inputs: Future, industry_number: int, year: int, data_path: str):
+    # gleiche Parameter wie die Voreinstellung der Seite "Synthetic profiles"
+    all_info_wz = inputs.result().set_index("industry_number")
+    pipeline.generate_profile(
+        industry_number,
+        year,
+        data_path,
+        fluctuation=all_info_wz.at[industry_number, "Fluktuation"],
+        energy=all_info_wz.at[industry_number, f"Energieverbrauch {year}"],
+        peak_faktor=all_info_wz.at[industry_number, "Peak_faktor"],
+        base_faktor=all_info_wz.at[industry_number, "Base_faktor"],
+        seed=0,
+    )
+
+
+def _open_profile_matrices(year: int):
+    # Profilspeicher mit den Feiertagen jedes Bundeslandes
+    for state in STATE_BY_AGS_PREFIX.values():
+        open_profile_matrix(year, state)
+
+
+def _log_failure(name: str, future: Future):
+    if future.exception() is not None:
+        logger.warning("cache warm-up of %s failed: %r", name, future.exception())
+
+
+def start_warm_up(
+    data_path: str = "data/profiles", year: int = 2019, max_workers: int | None = None
+) -> WarmUp:
+    """Submit all warm-up tasks and return immediately."""
+    max_workers = max_workers or min(4, os.cpu_count() or 1)
+    executor = ThreadPoolExecutor(max_workers, thread_name_prefix="warm-up")
+
+    futures = {"input data": executor.submit(_load_inputs, data_path)}
+    futures["regional profiles"] = executor.submit(_open_profile_matrices, year)
+    # ohne Cache-Backend würden die Ergebnisse verworfen
+    if not isinstance(cache.get_backend(), cache.NullCache):
+        for split_by in ("n_cap", "n_sites"):
+            futures[f"scaling matrix {split_by}"] = executor.submit(
+                get_regional_scaling_matrix, split_by
+            )
+        for industry_number in INDUSTRY_TYPE_IDS:
+            futures[f"industry type {industry_number}"] = executor.submit(
+                _default_profile,
+                futures["input data"],
+                industry_number,
+                year,
+                data_path,
+            )
+
+    for name, future in futures.items():
+        future.add_done_callback(lambda future, name=name: _log_failure(name, future))
+    executor.shutdown(wait=False)
+    return WarmUp(futures)